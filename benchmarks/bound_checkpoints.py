@@ -0,0 +1,64 @@
+"""Measure what binding a checkpoint to an instance costs.
+
+A player calls a method on many other instances, before calling it on the
+one its checkpoint is bound to. Compares that with a checkpoint on a
+function called only once, at the same point: the difference is the cost
+of reading the instance of the frames whose code matched.
+
+Usage::
+
+    python benchmarks/bound_checkpoints.py [calls]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+
+
+class Counter(object):
+    def __init__(self):
+        self.count = 0
+
+    def step(self):
+        self.count += 1
+
+
+def marker():
+    pass
+
+
+def run(others, target):
+    for counter in others:
+        counter.step()
+    marker()
+    target.step()
+
+
+def measure(calls, bound):
+    others = [Counter() for _ in range(calls)]
+    target = Counter()
+    player = ProcessPlayer(run, 'p', others, target)
+    if bound:
+        cp = player.add_checkpoint_after(target.step, bound=True)
+    else:
+        cp = player.add_checkpoint_after(marker)
+
+    start = time.time()
+    conductor = ProcessConductor([player], [cp])
+    while conductor.next() is not None:
+        pass
+    return time.time() - start
+
+
+def main(calls=100000):
+    print("{} calls on other instances".format(calls))
+    for bound in (False, True):
+        print("  {:<24} {:6.3f} s".format(
+            'bound to the target' if bound else 'on a marker function',
+            measure(calls, bound)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,47 @@
+"""Compare pausing at every checkpoint of a player with granting them at
+once, pausing only at the last one.
+
+Usage::
+
+    python benchmarks/coalesced_grants.py [checkpoints]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+
+
+def step():
+    pass
+
+
+def loop(iterations):
+    for _ in range(iterations):
+        step()
+
+
+def measure(checkpoints, pause_at_all):
+    player = ProcessPlayer(loop, 'p', checkpoints)
+    notes = [player.add_checkpoint_after(step) for _ in range(checkpoints)]
+    pause_at = None if pause_at_all else notes[-1:]
+
+    start = time.time()
+    conductor = ProcessConductor([player], notes, pause_at=pause_at)
+    while conductor.next() is not None:
+        pass
+    return time.time() - start, len(conductor.grants)
+
+
+def main(checkpoints=5000):
+    print("{} checkpoints of one player".format(checkpoints))
+    for pause_at_all in (True, False):
+        duration, grants = measure(checkpoints, pause_at_all)
+        print("  {:<16} {:6} grants  {:6.3f} s".format(
+            'pause at all' if pause_at_all else 'pause at last',
+            grants, duration))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
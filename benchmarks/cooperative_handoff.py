@@ -0,0 +1,46 @@
+"""Compare the latency of a checkpoint handoff between threaded and
+cooperative players.
+
+The player loops over a single step, with a checkpoint before every call.
+
+Usage::
+
+    python benchmarks/cooperative_handoff.py [steps]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+
+
+def step():
+    pass
+
+
+def loop(steps):
+    for _ in range(steps):
+        step()
+
+
+def measure(steps, cooperative):
+    player = ProcessPlayer(loop, 'looper', steps)
+    checkpoints = [player.add_checkpoint_before(step) for _ in range(steps)]
+    conductor = ProcessConductor([player], checkpoints, cooperative=cooperative)
+
+    start = time.time()
+    while conductor.next() is not None:
+        pass
+    return (time.time() - start) / steps
+
+
+def main(steps=2000):
+    print("{} handoffs".format(steps))
+    for label, cooperative in (('threads', False), ('greenlets', True)):
+        print("  {:<10} {:8.2f} us".format(
+            label, measure(steps, cooperative) * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,47 @@
+"""Compare conducting a player with and without the debug log.
+
+Usage::
+
+    python benchmarks/debug_log.py [checkpoints]
+"""
+from __future__ import print_function
+
+import io
+import sys
+import time
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.debuglog import DebugLog
+
+
+def step():
+    pass
+
+
+def loop(iterations):
+    for _ in range(iterations):
+        step()
+
+
+def measure(checkpoints, debug_log):
+    player = ProcessPlayer(loop, 'p', checkpoints)
+    notes = [player.add_checkpoint_after(step) for _ in range(checkpoints)]
+
+    start = time.time()
+    conductor = ProcessConductor([player], notes, debug_log=debug_log)
+    while conductor.next() is not None:
+        pass
+    return time.time() - start
+
+
+def main(checkpoints=5000):
+    print("{} checkpoints of one player".format(checkpoints))
+    print("  {:<16} {:6.3f} s".format('no log', measure(checkpoints, None)))
+    debug_log = DebugLog(io.StringIO())
+    duration = measure(checkpoints, debug_log)
+    print("  {:<16} {:6.3f} s  ({} entries, flush included)".format(
+        'debug log', duration, len(debug_log.entries())))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
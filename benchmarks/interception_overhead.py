@@ -0,0 +1,80 @@
+"""Measure what intercepting the synchronization primitives costs.
+
+Runs a lock-heavy loop:
+ - plainly
+ - under a profiler doing nothing, which is the floor for any profiler
+ - under the scheduling profiler, with every pause granted on the spot, which
+   is the cost of the interception itself
+ - under the InterleavingConductor, with a single player, which adds a
+   conductor handoff for every released lock
+
+Usage::
+
+    python benchmarks/interception_overhead.py [iterations]
+"""
+from __future__ import print_function
+
+import sys
+import threading
+import time
+
+from pyvaldi import ProcessPlayer
+from pyvaldi.interleaving import InterleavingConductor, SchedulingProfiler
+
+lock = threading.Lock()
+shared = {}
+
+
+def touch(key):
+    shared[key] = shared.get(key, 0) + 1
+
+
+def lock_heavy(iterations):
+    for idx in range(iterations):
+        touch(idx % 10)
+        with lock:
+            touch(idx % 7)
+
+
+def do_nothing(frame, action_string, arg):
+    pass
+
+
+class ImmediateBaton(object):
+    def wait_for_permission(self, checkpoint, turn):
+        pass
+
+
+def timed(function, *args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def main(iterations=20000):
+    plain = timed(lock_heavy, iterations)
+
+    sys.setprofile(do_nothing)
+    profiled = timed(lock_heavy, iterations)
+    sys.setprofile(None)
+
+    profiler = SchedulingProfiler(None, ImmediateBaton())
+    sys.setprofile(profiler.profile)
+    intercepted = timed(lock_heavy, iterations)
+    sys.setprofile(None)
+
+    player = ProcessPlayer(lock_heavy, 'looper', iterations)
+    conductor = InterleavingConductor([player])
+    conducted = timed(conductor.finish)
+
+    print("{} iterations".format(iterations))
+    for label, duration in (('plain', plain),
+                            ('profiled', profiled),
+                            ('intercepted', intercepted),
+                            ('conducted', conducted)):
+        print("  {:<12} {:8.1f} ms  {:6.1f}x".format(
+            label, duration * 1e3, duration / plain))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,75 @@
+"""Time the minimization of a long failing order, run one by one in this
+process, then across a process pool. The deposits take some time, like
+the requests of a real scenario would.
+
+Usage::
+
+    python benchmarks/minimizer.py [depositors] [processes]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyvaldi import ProcessPlayer
+from pyvaldi.explorer import Scenario
+from pyvaldi.minimizer import Minimizer
+
+
+class Account(object):
+    def __init__(self):
+        self.balance = 0
+
+
+class Depositor(object):
+    def __init__(self, account):
+        self.account = account
+        self.seen = None
+
+    def read(self):
+        self.seen = self.account.balance
+
+    def write(self):
+        time.sleep(0.05)
+        self.account.balance = self.seen + 1
+
+    def __call__(self):
+        self.read()
+        self.write()
+
+
+class DepositsScenario(Scenario):
+    def __init__(self, depositors):
+        self.depositors = depositors
+
+    def setup(self):
+        self.account = Account()
+        players = []
+        checkpoints = []
+        for idx in range(self.depositors):
+            depositor = Depositor(self.account)
+            player = ProcessPlayer(depositor, 'd{}'.format(idx))
+            players.append(player)
+            checkpoints.append(player.add_checkpoint_after(depositor.read))
+            checkpoints.append(player.add_checkpoint_after(depositor.write))
+        return players, checkpoints
+
+    def check(self):
+        assert self.account.balance == self.depositors
+
+
+def main(depositors=6, processes=4):
+    # Everybody reads, then everybody writes: all but one deposit are lost
+    schedule = tuple(range(depositors)) * 2
+    print("{} depositors, {} checkpoints".format(depositors, len(schedule)))
+    for workers in (0, processes):
+        minimizer = Minimizer(DepositsScenario(depositors), processes=workers)
+        start = time.time()
+        steps = minimizer.minimize(schedule)
+        print("  {:2} processes  {:3} steps left  {:4} runs  {:4} cached  "
+              "{:6.3f} s".format(workers, len(steps), minimizer.runs,
+                                 minimizer.cached, time.time() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
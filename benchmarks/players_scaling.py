@@ -0,0 +1,94 @@
+"""Measure how handoffs and parallel work scale with the number of players.
+
+Two sweeps over the number of players:
+
+* handoffs: the players take turns, round robin, at every step. Reports
+  the mean handoff latency (conductor grant to acknowledgement) and the
+  steps per second.
+* parallel: the players only share their start and end, and each runs a
+  fixed amount of pure Python work. On free-threaded builds (3.13t and
+  later) the wall time should stay flat as players are added, while with
+  the GIL it grows linearly.
+
+Usage::
+
+    python benchmarks/players_scaling.py [steps] [max players]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+
+WORK = 200000
+
+
+def step():
+    pass
+
+
+def loop(steps):
+    for _ in range(steps):
+        step()
+
+
+def work():
+    total = 0
+    for idx in range(WORK):
+        total += idx * idx
+    return total
+
+
+def handoffs(players_count, steps):
+    players = [ProcessPlayer(loop, 'p{}'.format(idx), steps)
+               for idx in range(players_count)]
+    notes = []
+    for _ in range(steps):
+        notes.extend(player.add_checkpoint_after(step) for player in players)
+
+    conductor = ProcessConductor(players, notes)
+    start = time.time()
+    while conductor.next() is not None:
+        pass
+    duration = time.time() - start
+    return duration / len(conductor.grants), len(notes) / duration
+
+
+def parallel(players_count):
+    players = [ProcessPlayer(work, 'p{}'.format(idx))
+               for idx in range(players_count)]
+    notes = [player.add_checkpoint_after(work) for player in players]
+
+    start = time.time()
+    conductor = ProcessConductor(players, notes, constraints=[])
+    while conductor.next() is not None:
+        pass
+    return time.time() - start
+
+
+def player_counts(max_players):
+    count = 1
+    while count <= max_players:
+        yield count
+        count *= 2
+
+
+def main(steps=200, max_players=16):
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print("Python {} ({})".format(
+        sys.version.split()[0], 'GIL' if gil else 'free-threaded'))
+
+    print("handoffs, {} steps per player".format(steps))
+    for count in player_counts(max_players):
+        latency, throughput = handoffs(count, steps)
+        print("  {:3} players  {:8.1f} us/handoff  {:9.0f} steps/s".format(
+            count, latency * 1e6, throughput))
+
+    print("parallel work")
+    for count in player_counts(max_players):
+        print("  {:3} players  {:6.3f} s".format(count, parallel(count)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,74 @@
+"""Measure the latency of a checkpoint handoff with a remote player.
+
+The agent runs in a separate process, and loops over a single step, with a
+checkpoint before every call. The conductor grants them one by one, so every
+``next()`` is one round trip over the persistent connection.
+
+Usage::
+
+    python benchmarks/remote_handoff.py [steps] [tcp|unix]
+"""
+from __future__ import print_function
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from pyvaldi import ProcessConductor
+from pyvaldi.remote import ConductorServer, PlayerAgent
+
+
+def step():
+    pass
+
+
+def loop(steps):
+    for _ in range(steps):
+        step()
+
+
+def host_agent(address, steps):
+    agent = PlayerAgent(address, loop, 'looper', steps)
+    agent.add_checkpoint_before(step)
+    agent.run()
+
+
+def main(steps=2000, transport='tcp'):
+    if transport == 'tcp':
+        address = ('127.0.0.1', 0)
+    else:
+        address = os.path.join(tempfile.mkdtemp(), 'conductor.sock')
+
+    server = ConductorServer(address)
+    process = multiprocessing.Process(
+        target=host_agent, args=(server.address, steps))
+    process.start()
+
+    player = server.player('looper')
+    checkpoints = [player.add_checkpoint_before('step') for _ in range(steps)]
+    conductor = ProcessConductor([player], checkpoints)
+
+    next(conductor)  # the connection is set up during the first handoff
+    durations = []
+    for _ in range(steps - 1):
+        start = time.time()
+        next(conductor)
+        durations.append(time.time() - start)
+    next(conductor)
+
+    process.join()
+    server.close()
+    if transport != 'tcp':
+        os.unlink(address)
+
+    durations.sort()
+    print("{} handoffs over {}".format(len(durations), transport))
+    for label, quantile in (('median', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        duration = durations[int(quantile * (len(durations) - 1))]
+        print("  {:<7} {:8.1f} us".format(label, duration * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) if arg.isdigit() else arg for arg in sys.argv[1:]])
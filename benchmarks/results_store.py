@@ -0,0 +1,43 @@
+"""Measure recording and summarizing runs in the columnar results store.
+
+Synthetic runs of a scenario with 8 checkpoints are appended, then
+summarized, to check both scale to millions of rows.
+
+Usage::
+
+    python benchmarks/results_store.py [runs]
+"""
+from __future__ import print_function
+
+import random
+import sys
+import time
+
+from pyvaldi.results import ResultsStore
+
+NAMES = ['cp{}'.format(idx) for idx in range(8)]
+
+
+def main(runs=1000000):
+    store = ResultsStore(NAMES, chunk_size=65536)
+    orders = [random.sample(NAMES, len(NAMES)) for _ in range(64)]
+    durations = [random.random() * 1e-4 for _ in NAMES]
+
+    start = time.time()
+    for run in range(runs):
+        order = orders[run % len(orders)]
+        store.append(order, durations, failed=order[0] == 'cp0')
+    appended = time.time() - start
+
+    start = time.time()
+    store.percentiles()
+    store.slowest()
+    store.failure_clusters()
+    summarized = time.time() - start
+
+    print("{} runs: append {:.2f} us/run, summaries {:.2f} s".format(
+        runs, appended / runs * 1e6, summarized))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+"""Compare the memory used by materialized and streaming music sheets.
+
+Two players alternate on every iteration of a loop. The materialized sheet
+needs a checkpoint per iteration, the streaming one repeats a pattern of 2.
+
+Usage::
+
+    python benchmarks/streaming_memory.py [iterations]
+"""
+from __future__ import print_function
+
+import sys
+import time
+import tracemalloc
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.streaming import StreamingConductor, repeat
+
+
+def step():
+    pass
+
+
+def loop(iterations):
+    for _ in range(iterations):
+        step()
+
+
+def materialized(iterations):
+    a = ProcessPlayer(loop, 'a', iterations)
+    b = ProcessPlayer(loop, 'b', iterations)
+    notes = []
+    for _ in range(iterations):
+        notes.append(a.add_checkpoint_after(step))
+        notes.append(b.add_checkpoint_after(step))
+    return ProcessConductor([a, b], notes)
+
+
+def streaming(iterations):
+    a = ProcessPlayer(loop, 'a', iterations)
+    b = ProcessPlayer(loop, 'b', iterations)
+    pattern = [a.add_checkpoint_after(step), b.add_checkpoint_after(step)]
+    return StreamingConductor([a, b], repeat(pattern, iterations))
+
+
+def measure(build, iterations):
+    tracemalloc.start()
+    start = time.time()
+    conductor = build(iterations)
+    while conductor.next() is not None:
+        pass
+    duration = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, duration
+
+
+def main(iterations=2000):
+    print("{} iterations".format(iterations))
+    for build in (materialized, streaming):
+        peak, duration = measure(build, iterations)
+        print("  {:<13} peak {:8.1f} KiB  {:6.2f} s".format(
+            build.__name__, peak / 1024.0, duration))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -63,7 +63,8 @@ setup(
     ],
     tests_require=['nose>=1.3.7,<1.4'],
     extras_require={
-        # eg: 'rst': ['docutils>=0.11'],
+        'cooperative': ['greenlet'],
+        'results': ['numpy'],
     },
     entry_points={
         'console_scripts': [
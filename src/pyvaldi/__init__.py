@@ -1,8 +1,17 @@
+import os
 import threading
 
 import pkg_resources
 
-from pyvaldi.checkpoints import Checkpoint, NullCheckpoint, ImplicitCheckpoint
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+from pyvaldi.captures import CaptureRunner
+from pyvaldi.checkpoints import (  # noqa: F401, re-exported
+    Checkpoint, NullCheckpoint, ImplicitCheckpoint, create_checkpoint)
+from pyvaldi.cooperative import CooperativeBaton
 from pyvaldi.sync import CascadingEventGroup
 from pyvaldi.thread import InstrumentedThread
 
@@ -11,9 +20,11 @@ try:
 except pkg_resources.DistributionNotFound:
     pass
 
-log_lock = threading.Lock()
-from .stacktracer import trace_start
-trace_start('/tmp/trace')
+# Opt-in stack tracing of every process importing pyvaldi, agents and pool
+# workers included, see pyvaldi.stacktracer
+if os.environ.get('PYVALDI_TRACE'):
+    from .stacktracer import trace_start
+    trace_start(os.environ['PYVALDI_TRACE'])
 
 class ProcessPlayer(object):
     """Starts a process, and sets Checkpoints in its lifecycle"""
@@ -26,19 +37,30 @@ class ProcessPlayer(object):
         :return:
         """
         self.name = name
+        self.target = callable_
+        self.args = args_for_callable
+        self.kwargs = kwargs_for_callable
         self.music_sheet = None
         self._terminal_checkpoint = ImplicitCheckpoint(self, None)
         self._initial_checkpoint = ImplicitCheckpoint(self, None, before=True)
-        self.instrument = InstrumentedThread(
-            target=callable_, args=args_for_callable, kwargs=kwargs_for_callable)
+        self.instrument = None
+
+    def add_checkpoint_after(self, callable_, name=None, bound=False):
+        """Create and return a checkpoint, set AFTER the callable returns.
 
-    def add_checkpoint_after(self, callable_, name=None):
-        """Create and return a checkpoint, set AFTER the callable returns"""
-        return Checkpoint(self, callable_, name=name)
+        With `bound`, a checkpoint set on a method is only reached by calls
+        on the instance the method was taken from.
+        """
+        return create_checkpoint(self, callable_, name=name, bound=bound)
 
-    def add_checkpoint_before(self, callable_, name=None):
-        """Create and return a checkpoint, set BEFORE the callable returns"""
-        return Checkpoint(self, callable_, before=True, name=name)
+    def add_checkpoint_before(self, callable_, name=None, bound=False):
+        """Create and return a checkpoint, set BEFORE the callable returns.
+
+        With `bound`, a checkpoint set on a method is only reached by calls
+        on the instance the method was taken from.
+        """
+        return create_checkpoint(
+            self, callable_, before=True, name=name, bound=bound)
 
     def get_terminal_checkpoint(self):
         """Returns a checkpoint that marks the process end"""
@@ -50,6 +72,8 @@ class ProcessPlayer(object):
 
     def play(self, player_checkpoints, baton):
         self.music_sheet = player_checkpoints
+        self.instrument = baton.instrument_class(
+            target=self.target, args=self.args, kwargs=self.kwargs)
         self.instrument.tune(baton, player_checkpoints)
         self.instrument.start()
 
@@ -64,49 +88,236 @@ class ProcessConductor(object):
     checkpoints that were set
     """
 
-    def __init__(self, players=None, checkpoints=None):
+    def __init__(self, players=None, checkpoints=None, constraints=None,
+                 cooperative=False, accounting=False, pause_at=None,
+                 captures=None, capture_workers=4, debug_log=None):
         """
         :param list[ProcessPlayer] players: a list of process players
         :param list[pyvaldi.checkpoints.Checkpoint] checkpoints: an list of
         checkpoints (notes)
+        :param list[tuple] | None constraints: pairs of (earlier, later)
+            checkpoints. When given, the checkpoints are only ordered by
+            these constraints, and the players run concurrently otherwise.
+        :param bool cooperative: run the players as greenlets on the current
+            OS thread, instead of threads (see :mod:`pyvaldi.cooperative`)
+        :param bool accounting: measure the overhead of conducting the
+            players, see :meth:`get_overhead`
+        :param list[pyvaldi.checkpoints.Checkpoint] | None pause_at: the
+            notes to pause at and return from :meth:`next`, all of them by
+            default. The consecutive checkpoints of a player up to a pause
+            are granted at once, so the player runs through them without
+            waiting for the conductor.
+        :param dict | None captures: {name: callable}, capturing some state
+            at every pause, concurrently (see :mod:`pyvaldi.captures`). The
+            results are found in the ``snapshot`` of the returned checkpoint.
+        :param int capture_workers: how many captures run at once
+        :param pyvaldi.debuglog.DebugLog | None debug_log: where the baton
+            records the synchronization of the players. It's written out
+            at the end of the run.
         """
+        if cooperative and constraints is not None:
+            raise ValueError(
+                "Players only running one at a time can't run concurrently")
+        if accounting and (cooperative or constraints is not None):
+            raise ValueError(
+                "The overhead is only accounted for when players run as "
+                "threads, in a total order")
+        if captures and constraints is not None:
+            raise ValueError(
+                "The players never pause together when only ordered by "
+                "constraints, so there is nothing to capture")
         self.players = players
         self.checkpoints = checkpoints
+        self.constraints = constraints
+        self.accounting = accounting
+        if pause_at is None:
+            self.pauses = checkpoints
+        else:
+            pause_at = set(pause_at)
+            if not pause_at.issubset(checkpoints):
+                raise ValueError("Can only pause at the given checkpoints")
+            self.pauses = [cp for cp in checkpoints if cp in pause_at]
 
+        # The indexes are only moved by the thread driving the conductor
         self.note_idx = 0
-        self.implicit_note_idx = 0
+        self.grant_idx = 0
+        self.driving = threading.Lock()
+        self.playing = len(players)
+        self.capture_runner = CaptureRunner(captures, capture_workers)
+        self.snapshot = None
+        self.failed = set()  # players whose error was raised already
+
+        if constraints is None:
+            self.music_sheet = MusicSheet(checkpoints)
+            self.grants = self.music_sheet.grants(self.pauses)
+            if accounting:
+                from pyvaldi.accounting import AccountingBaton
+                baton_class = AccountingBaton
+            elif cooperative:
+                baton_class = CooperativeBaton
+            else:
+                baton_class = Baton
+            self.baton = baton_class(self.music_sheet.checkpoint_order)
+        else:
+            self.music_sheet = PartialMusicSheet(checkpoints, constraints)
+            self.baton = PartialBaton(self.music_sheet)
 
-        self.music_sheet = MusicSheet(checkpoints)
-        self.baton = Baton(self.music_sheet.checkpoint_order)
+        self.debug_log = debug_log
+        self.baton.debug_log = debug_log
 
         for player in players:
             player.play(self.music_sheet.player_checkpoints(player), self.baton)
 
     def next(self):
+        """Let the players run until the next of the pauses, and return it.
+
+        The music sheet adds the implicit checkpoints to the user's: each
+        player starts at an initial one, and runs to its end at a terminal
+        one, right after its last user checkpoint. The sheet is split into
+        grants: the consecutive checkpoints of a player up to one of the
+        ``pause_at`` checkpoints, or up to another player's turn. All the
+        checkpoints of a grant are permitted at once, and only the
+        acknowledgement of the last one is waited on.
+
+        With constraints instead of a total order, return the next user
+        checkpoint any player reached.
+
+        :return: the checkpoint paused at, or None once the players ended
+        :rtype: pyvaldi.checkpoints.Checkpoint | None
+        """
+        self.take_over()
+        try:
+            if self.constraints is not None:
+                return self.next_reached()
+
+            self.release_snapshot()
+            while self.grant_idx < len(self.grants):
+                grant = self.grants[self.grant_idx]
+                for checkpoint in grant:
+                    self.baton.yield_permission(checkpoint)
+                self.baton.wait_acknowledgement(grant[-1])
+
+                paused = self.passed(grant)
+                self.raise_error(grant[-1].player)
+                if paused:
+                    return self.take_snapshot(grant[-1])
+            self.finish()
+        finally:
+            self.driving.release()
+
+    def take_over(self):
+        """Make sure the conductor is driven by a single caller at a time.
+
+        Its indexes have no lock of their own, as the players never touch
+        them. Driving it from several threads at once would corrupt them,
+        even more so on free-threaded builds.
         """
-        User CPS:       C1-1       C2-1   C1-2   C2-2   C2-3   C2-4         C1-3
-        Impli CPS: IC1  C1-1  IC2  C2-1   C1-2   C2-2   C2-3   C2-4   TC2   C1-3   TC1
+        if not self.driving.acquire(False):
+            raise RuntimeError("The conductor is already being driven")
 
-        Restrict!
-            - always enter on user note
-            - increase implicit index, until meeting the user note
+    def passed(self, grant):
+        """Move past a grant of the music sheet, once its last checkpoint
+        was reached
+
+        :param list[pyvaldi.checkpoints.Checkpoint] grant:
+        :return: whether it ends at the next of the user's pauses
+        :rtype: bool
+        """
+        self.grant_idx += 1
+        pauses = self.pauses
+        if self.note_idx < len(pauses) and grant[-1] is pauses[self.note_idx]:
+            self.note_idx += 1
+            return True
+        return False
+
+    def raise_error(self, player):
+        """Re-raise the error that kept a player from playing its part,
+        such as a remote agent disconnecting, the first time it's noticed.
+
+        Such players acknowledge their remaining checkpoints right away, so
+        the conductor can still go on.
         """
-        notes = self.checkpoints
-        i_notes = self.music_sheet.checkpoint_order
-        if self.note_idx >= len(notes):
-            return
+        error = getattr(player, 'error', None)
+        if error is not None and player not in self.failed:
+            self.failed.add(player)
+            raise error
 
-        while i_notes[self.implicit_note_idx] is not notes[self.note_idx]:
-            self.baton.yield_permission(i_notes[self.implicit_note_idx])
-            self.baton.wait_acknowledgement(i_notes[self.implicit_note_idx])
-            self.implicit_note_idx += 1
-            if self.implicit_note_idx >= len(i_notes):
-                return
-        else:
-            try:
-                return notes[self.note_idx]
-            finally:
-                self.note_idx += 1
+    def finish(self):
+        """Clean up once the players ended"""
+        self.capture_runner.shutdown()
+        if self.debug_log is not None:
+            self.debug_log.flush()
+
+    def take_snapshot(self, checkpoint):
+        """Start the captures of the pause at the checkpoint
+
+        :return: the checkpoint, with its snapshot attached
+        """
+        checkpoint.snapshot = self.snapshot = \
+            self.capture_runner.take(checkpoint)
+        return checkpoint
+
+    def release_snapshot(self):
+        """Wait for the captures of the last pause that were started,
+        before the players go on, skipping the others
+        """
+        futures = self.close_snapshot()
+        if futures:
+            from concurrent.futures import wait
+            wait(futures)
+
+    def close_snapshot(self):
+        """Skip the captures of the last pause not started yet
+
+        :return: the futures of the captures to wait for
+        :rtype: list[concurrent.futures.Future]
+        """
+        if self.snapshot is None:
+            return []
+        futures = self.snapshot.close()
+        self.snapshot = None
+        return futures
+
+    def next_async(self):
+        """Like :meth:`next`, but awaited instead of blocking the thread
+        running the asyncio event loop (Python 3 only)
+        """
+        from pyvaldi.aio import next_async
+        return next_async(self)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        from pyvaldi.aio import anext
+        return anext(self)
+
+    def get_overhead(self):
+        """Return the overhead of the run so far, when accounting for it
+
+        :rtype: pyvaldi.accounting.OverheadSummary | None
+        """
+        if not self.accounting:
+            return None
+        from pyvaldi.accounting import OverheadSummary
+        return OverheadSummary(self.baton.accountant.ledgers)
+
+    def next_reached(self):
+        """Return the next checkpoint reached by any of the players, when
+        running a partially ordered music sheet.
+
+        The players aren't paused there, only the constraints hold them back.
+        """
+        while self.playing:
+            checkpoint = self.baton.reached.get()
+            if checkpoint.is_terminal():
+                self.playing -= 1
+            self.raise_error(checkpoint.player)
+            if not isinstance(checkpoint, ImplicitCheckpoint):
+                return checkpoint
+        self.finish()
+
+    __next__ = next
 
     def __iter__(self):
         return self
@@ -121,6 +332,24 @@ class MusicSheet(object):
     def player_checkpoints(self, player):
         return [cp for cp in self.checkpoint_order if cp.player is player]
 
+    def grants(self, pauses):
+        """Split the checkpoint order into the permissions granted at once:
+        runs of consecutive checkpoints of the same player, ending at the
+        checkpoints paused at.
+
+        :param list[pyvaldi.checkpoints.Checkpoint] pauses:
+        :rtype: list[list[pyvaldi.checkpoints.Checkpoint]]
+        """
+        pauses = set(pauses)
+        grants = []
+        for cp in self.checkpoint_order:
+            if (grants and grants[-1][-1].player is cp.player and
+                    grants[-1][-1] not in pauses):
+                grants[-1].append(cp)
+            else:
+                grants.append([cp])
+        return grants
+
     def determine_checkpoint_order(self, checkpoints):
         """Return a list of players, representing the order they should be
         allowed to play in.
@@ -163,35 +392,163 @@ class MusicSheet(object):
         return result_checkpoints
 
 
+class PartialMusicSheet(object):
+    """Only orders the checkpoints of different players by the given
+    constraints. The checkpoints of one player are reached in the order they
+    appear in.
+    """
+    def __init__(self, checkpoints, constraints):
+        """
+        :param list[pyvaldi.checkpoints.Checkpoint] checkpoints: all the
+            checkpoints of the players. Their order only matters per player.
+        :param list[tuple] constraints: pairs of (earlier, later) checkpoints
+        """
+        checkpoints = [cp for cp in checkpoints
+                       if not isinstance(cp, ImplicitCheckpoint)]
+        players = []
+        for cp in checkpoints:
+            if cp.player not in players:
+                players.append(cp.player)
+
+        self.sequences = {}  # {player: list[Checkpoint]}
+        for player in players:
+            self.sequences[player] = (
+                [player.get_initial_checkpoint()] +
+                [cp for cp in checkpoints if cp.player is player] +
+                [player.get_terminal_checkpoint()])
+
+        self.checkpoints = [
+            cp for player in players for cp in self.sequences[player]]
+        known = set(self.checkpoints)
+        self.predecessors = {}  # {Checkpoint: list[Checkpoint]}
+        for earlier, later in constraints:
+            for cp in (earlier, later):
+                if cp not in known:
+                    raise ValueError("{} is not on the music sheet".format(cp))
+            self.predecessors.setdefault(later, []).append(earlier)
+
+        self.check_acyclic()
+
+    def player_checkpoints(self, player):
+        return self.sequences[player]
+
+    def check_acyclic(self):
+        """Make sure the constraints can be satisfied, by topologically
+        sorting the checkpoints
+        """
+        successors = dict((cp, []) for cp in self.checkpoints)
+        incoming = dict((cp, 0) for cp in self.checkpoints)
+        for sequence in self.sequences.values():
+            for earlier, later in zip(sequence, sequence[1:]):
+                successors[earlier].append(later)
+                incoming[later] += 1
+        for later, predecessors in self.predecessors.items():
+            for earlier in predecessors:
+                successors[earlier].append(later)
+                incoming[later] += 1
+
+        ready = [cp for cp in self.checkpoints if not incoming[cp]]
+        sorted_count = 0
+        while ready:
+            cp = ready.pop()
+            sorted_count += 1
+            for successor in successors[cp]:
+                incoming[successor] -= 1
+                if not incoming[successor]:
+                    ready.append(successor)
+
+        if sorted_count != len(self.checkpoints):
+            raise ValueError("The constraints contain a cycle")
+
+
+class PartialBaton(object):
+    """Lets each player run to its next checkpoint as soon as all the
+    checkpoints it is constrained by were reached
+    """
+    instrument_class = InstrumentedThread
+    debug_log = None  # pyvaldi.debuglog.DebugLog
+
+    def __init__(self, music_sheet):
+        """
+        :param PartialMusicSheet music_sheet:
+        """
+        self.predecessors = music_sheet.predecessors
+        self.arrivals = dict(
+            (cp, threading.Event()) for cp in music_sheet.checkpoints)
+        self.reached = Queue()
+
+    def wait_for_permission(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('waits for permission', checkpoint)
+        for predecessor in self.predecessors.get(checkpoint, ()):
+            self.arrivals[predecessor].wait()
+
+    def acknowledge_checkpoint(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('acknowledges', checkpoint)
+        self.arrivals[checkpoint].set()
+        self.reached.put(checkpoint)
+
+
 class Baton(object):
     """The Conductor's instrument for synchronizing the players.
     """
-    def log(self, cp):
-        log_lock.acquire()
-        import inspect
-        func_name = inspect.currentframe().f_back.f_code.co_name
-        print("{} in {} waiting on {}".format(threading.current_thread().name, func_name, cp))
-        log_lock.release()
+    instrument_class = InstrumentedThread
+
+    debug_log = None  # pyvaldi.debuglog.DebugLog
 
     def __init__(self, checkpoint_order):
         self.player_event = CascadingEventGroup(checkpoint_order, 'player evt.')
         self.conductor_event = CascadingEventGroup(checkpoint_order, 'conductor evt')
-        self.log_lock = threading.Lock()
+        # players that can't block waiting for permission: {player: callback}
+        self.listeners = {}
+        # conductors that can't block waiting: {checkpoint: callback}
+        self.acknowledgement_callbacks = {}
+
+    def listen(self, player, callback):
+        """Call the callback with every checkpoint the player is granted,
+        right after granting it.
+
+        For players that don't wait for permission on a thread of their own.
+        """
+        self.listeners[player] = callback
 
     def wait_for_permission(self, checkpoint):
-        # self.log(checkpoint)
+        if self.debug_log is not None:
+            self.debug_log.record('waits for permission', checkpoint)
         self.player_event.wait_on(checkpoint)
 
     def yield_permission(self, checkpoint):
-        # self.log(checkpoint)
+        if self.debug_log is not None:
+            self.debug_log.record('grants', checkpoint)
         self.player_event.done_with(checkpoint)
+        listener = self.listeners.get(checkpoint.player)
+        if listener is not None:
+            listener(checkpoint)
 
     def wait_acknowledgement(self, checkpoint):
-        # self.log(checkpoint)
+        if self.debug_log is not None:
+            self.debug_log.record('waits for acknowledgement', checkpoint)
         self.conductor_event.wait_on(checkpoint)
 
     def acknowledge_checkpoint(self, checkpoint):
-        # self.log(checkpoint)
+        if self.debug_log is not None:
+            self.debug_log.record('acknowledges', checkpoint)
         self.conductor_event.done_with(checkpoint)
+        callback = self.acknowledgement_callbacks.pop(checkpoint, None)
+        if callback is not None:
+            callback()
+
+    def on_acknowledgement(self, checkpoint, callback):
+        """Call the callback once the checkpoint is acknowledged, instead of
+        waiting for it. It's called on the acknowledging player's thread, or
+        right away if the checkpoint was already acknowledged.
+        """
+        self.acknowledgement_callbacks[checkpoint] = callback
+        if self.conductor_event.event_dict[checkpoint].is_set():
+            # Whoever pops the callback calls it, so it's only called once
+            callback = self.acknowledgement_callbacks.pop(checkpoint, None)
+            if callback is not None:
+                callback()
 
 
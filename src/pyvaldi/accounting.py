@@ -0,0 +1,156 @@
+"""Accounting of the overhead pyvaldi adds to the players it conducts.
+
+With ``ProcessConductor(..., accounting=True)`` every thread involved keeps
+its own :class:`Ledger`, only ever written by that thread, so no locks are
+needed. Once the players ended, :meth:`pyvaldi.ProcessConductor.get_overhead`
+sums them up into an :class:`OverheadSummary`.
+"""
+import threading
+from collections import defaultdict
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+from pyvaldi import Baton
+from pyvaldi.profiler import RhythmProfiler
+from pyvaldi.thread import InstrumentedThread
+
+
+class Ledger(object):
+    """The counters of a single thread"""
+    def __init__(self, thread_name):
+        self.thread_name = thread_name
+        self.player = None  # None for the conductor's thread
+        self.events = 0  # profile events seen
+        self.profile_time = 0.0  # in the profile function, except waiting
+        self.waiting_time = 0.0
+        self.handoffs = 0  # waits that actually blocked
+        self.permission_waits = defaultdict(float)  # {checkpoint: seconds}
+        self.acknowledgement_waits = defaultdict(float)  # {checkpoint: sec.}
+
+
+class Accountant(object):
+    """Hands every thread its own ledger"""
+    def __init__(self):
+        self.local = threading.local()
+        self.ledgers = []
+
+    def ledger(self):
+        try:
+            return self.local.ledger
+        except AttributeError:
+            ledger = Ledger(threading.current_thread().name)
+            self.local.ledger = ledger
+            self.ledgers.append(ledger)
+            return ledger
+
+
+class AccountingProfiler(RhythmProfiler):
+    """Counts the profile events, and the time spent handling them"""
+    def __init__(self):
+        super(AccountingProfiler, self).__init__()
+        self.ledger = None
+
+    def profile(self, frame, action_string, whatever):
+        ledger = self.ledger
+        if ledger is None:
+            ledger = self.ledger = self.baton.accountant.ledger()
+        start = perf_counter()
+        waiting_time = ledger.waiting_time
+
+        super(AccountingProfiler, self).profile(frame, action_string, whatever)
+
+        ledger.events += 1
+        ledger.profile_time += (
+            perf_counter() - start - (ledger.waiting_time - waiting_time))
+
+
+class AccountingThread(InstrumentedThread):
+    def __init__(self, group=None, target=None, name=None,
+                 args=(), kwargs=None):
+        super(AccountingThread, self).__init__(
+            group, target, name, args, kwargs)
+        self.profiler = AccountingProfiler()
+
+
+class AccountingBaton(Baton):
+    """Times the waits of the conductor and of the players"""
+    instrument_class = AccountingThread
+
+    def __init__(self, checkpoint_order):
+        super(AccountingBaton, self).__init__(checkpoint_order)
+        self.accountant = Accountant()
+
+    def wait_for_permission(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('waits for permission', checkpoint)
+        ledger = self.accountant.ledger()
+        ledger.player = checkpoint.player
+        self._wait(ledger, self.player_event.event_dict[checkpoint],
+                   ledger.permission_waits, checkpoint)
+
+    def wait_acknowledgement(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('waits for acknowledgement', checkpoint)
+        ledger = self.accountant.ledger()
+        self._wait(ledger, self.conductor_event.event_dict[checkpoint],
+                   ledger.acknowledgement_waits, checkpoint)
+
+    @staticmethod
+    def _wait(ledger, event, waits, checkpoint):
+        if event.is_set():
+            waits[checkpoint] += 0.0
+            return
+        ledger.handoffs += 1
+        start = perf_counter()
+        event.wait()
+        waited = perf_counter() - start
+        waits[checkpoint] += waited
+        ledger.waiting_time += waited
+
+
+class OverheadSummary(object):
+    """The overhead of a run, per player and per checkpoint"""
+    def __init__(self, ledgers):
+        """
+        :param list[Ledger] ledgers:
+        """
+        self.players = {}  # {player: Ledger}
+        self.conductor = None
+        for ledger in ledgers:
+            if ledger.player is None:
+                self.conductor = ledger
+            else:
+                self.players[ledger.player] = ledger
+
+        self.events = sum(ledger.events for ledger in ledgers)
+        self.profile_time = sum(ledger.profile_time for ledger in ledgers)
+        self.waiting_time = sum(ledger.waiting_time for ledger in ledgers)
+        self.handoffs = sum(ledger.handoffs for ledger in ledgers)
+
+        self.permission_waits = {}  # {checkpoint: seconds}
+        self.acknowledgement_waits = {}  # {checkpoint: seconds}
+        for ledger in ledgers:
+            self.permission_waits.update(ledger.permission_waits)
+            self.acknowledgement_waits.update(ledger.acknowledgement_waits)
+
+    def report(self):
+        """Return a human readable table of the overhead of each player
+
+        :rtype: str
+        """
+        lines = [u'{:<20} {:>10} {:>12} {:>12} {:>9}'.format(
+            u'thread', u'events', u'profile (s)', u'waiting (s)',
+            u'handoffs')]
+        ledgers = list(self.players.values())
+        if self.conductor is not None:
+            ledgers.append(self.conductor)
+        for ledger in ledgers:
+            name = (ledger.player.name if ledger.player is not None
+                    else u'conductor')
+            lines.append(u'{:<20} {:>10} {:>12.6f} {:>12.6f} {:>9}'.format(
+                name, ledger.events, ledger.profile_time,
+                ledger.waiting_time, ledger.handoffs))
+        return u'\n'.join(lines)
@@ -0,0 +1,67 @@
+"""Driving a :class:`pyvaldi.ProcessConductor` from asyncio code.
+
+``await conductor.next_async()`` and ``async for checkpoint in conductor``
+grant permissions like :meth:`pyvaldi.ProcessConductor.next`, but instead
+of blocking until the players acknowledge them, they have the player
+threads wake the event loop up, with ``call_soon_threadsafe``. Other
+coroutines, such as fake services the players talk to, keep running in
+the meantime. The captures of the previous pause are awaited the same way.
+
+The players still run on threads of their own, so this requires the
+default, totally ordered music sheet. Like :meth:`pyvaldi.ProcessConductor.next`,
+a call shouldn't be cancelled before it returns.
+"""
+import asyncio
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+async def acknowledged(baton, grant):
+    """Grant the permission for the checkpoints, and wait until the last
+    one is acknowledged, without blocking the event loop
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    baton.on_acknowledgement(
+        grant[-1], lambda: loop.call_soon_threadsafe(_resolve, future))
+    for checkpoint in grant:
+        baton.yield_permission(checkpoint)
+    await future
+
+
+async def next_async(conductor):
+    """See :meth:`pyvaldi.ProcessConductor.next_async`"""
+    if (conductor.constraints is not None or
+            not hasattr(conductor.baton, 'on_acknowledgement')):
+        raise ValueError(
+            "Only players running as threads in a total order can be "
+            "conducted asynchronously")
+
+    conductor.take_over()
+    try:
+        futures = conductor.close_snapshot()
+        if futures:
+            await asyncio.wait(
+                [asyncio.wrap_future(future) for future in futures])
+        grants = conductor.grants
+        while conductor.grant_idx < len(grants):
+            grant = grants[conductor.grant_idx]
+            await acknowledged(conductor.baton, grant)
+
+            paused = conductor.passed(grant)
+            conductor.raise_error(grant[-1].player)
+            if paused:
+                return conductor.take_snapshot(grant[-1])
+        conductor.finish()
+    finally:
+        conductor.driving.release()
+
+
+async def anext(conductor):
+    checkpoint = await next_async(conductor)
+    if checkpoint is None:
+        raise StopAsyncIteration
+    return checkpoint
@@ -0,0 +1,111 @@
+"""State captured while the players are held at a checkpoint.
+
+Capture callbacks can be set on the conductor, run at every pause, or on
+single checkpoints with :meth:`pyvaldi.checkpoints.Checkpoint.add_capture`.
+When :meth:`pyvaldi.ProcessConductor.next` pauses, it attaches a
+:class:`Snapshot` to the returned checkpoint. Captures only run when
+they're asked for, as ``checkpoint.snapshot[name]``, on a bounded thread
+pool. :meth:`Snapshot.prefetch` starts several of them at once, to run
+concurrently.
+
+Before letting the players go on, the conductor waits for the captures
+started, so that they all see the state of the pause. Captures never asked
+for are skipped: reading them afterwards raises :class:`CaptureSkipped`.
+"""
+
+
+class CaptureSkipped(Exception):
+    """Raised when reading a capture skipped as the players went on"""
+
+
+class Snapshot(object):
+    """The captures of a single pause, by name"""
+    def __init__(self, checkpoint, captures, runner):
+        """
+        :param pyvaldi.checkpoints.Checkpoint checkpoint: the pause
+        :param dict captures: {name: callable}
+        :param CaptureRunner runner: where the captures run
+        """
+        self.checkpoint = checkpoint
+        self.captures = captures
+        self.runner = runner
+        self.futures = {}  # {name: concurrent.futures.Future}, once started
+        self.closed = False
+
+    def prefetch(self, *names):
+        """Start the captures with these names, all of them by default,
+        without waiting for them
+        """
+        for name in names or self.captures:
+            self._start(name)
+
+    def _start(self, name):
+        future = self.futures.get(name)
+        if future is None:
+            capture = self.captures[name]
+            if self.closed:
+                raise CaptureSkipped(
+                    "{!r} wasn't captured before the players went on past "
+                    "{}".format(name, self.checkpoint))
+            future = self.futures[name] = self.runner.submit(
+                capture, self.checkpoint)
+        return future
+
+    def __getitem__(self, name):
+        return self._start(name).result()
+
+    def __contains__(self, name):
+        return name in self.captures
+
+    def __iter__(self):
+        return iter(self.captures)
+
+    def __len__(self):
+        return len(self.captures)
+
+    def close(self):
+        """Skip the captures not started yet
+
+        :return: the futures of those started, which the players must wait
+            for before going on
+        :rtype: list[concurrent.futures.Future]
+        """
+        self.closed = True
+        return list(self.futures.values())
+
+
+class CaptureRunner(object):
+    """Runs the captures of the pauses on a bounded thread pool"""
+    def __init__(self, captures=None, max_workers=4):
+        """
+        :param dict | None captures: {name: callable}, run at every pause.
+            Each callable receives the checkpoint paused at.
+        :param int max_workers: how many captures run at once
+        """
+        self.captures = dict(captures or {})
+        self.max_workers = max_workers
+        self.pool = None
+
+    def take(self, checkpoint):
+        """Return the snapshot of the checkpoint, without starting any
+        capture
+
+        :rtype: Snapshot | None
+        """
+        captures = dict(self.captures)
+        captures.update(checkpoint.captures)
+        if not captures:
+            return None
+        return Snapshot(checkpoint, captures, self)
+
+    def submit(self, capture, checkpoint):
+        if self.pool is None:
+            # Only required once captures are used (Python 3.2+)
+            from concurrent.futures import ThreadPoolExecutor
+            self.pool = ThreadPoolExecutor(self.max_workers)
+        return self.pool.submit(capture, checkpoint)
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
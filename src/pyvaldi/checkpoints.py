@@ -1,3 +1,17 @@
+import types
+
+
+class UnreachedCheckpoint(Exception):
+    """Raised when a player ended before reaching a checkpoint it was
+    granted
+    """
+    def __init__(self, checkpoint):
+        super(UnreachedCheckpoint, self).__init__(
+            "{} ended before reaching {}".format(
+                checkpoint.player, checkpoint))
+        self.checkpoint = checkpoint
+
+
 class Checkpoint(object):
     """Represents an instance in the life of a process.
 
@@ -20,13 +34,40 @@ class Checkpoint(object):
         self.player = player
         self.callable = callable_
         self.before = before
+        self.captures = {}
+        self.snapshot = None
 
     def is_reached(self, code):
         """
         :param code: a callable to compare to the managed one
         :rtype: bool
         """
-        return self.callable.func_code is code
+        return self.callable.__code__ is code
+
+    def is_reached_by(self, frame):
+        """Only asked once :meth:`is_reached` matched the frame's code
+
+        :param frame: the frame running the code of the callable
+        :rtype: bool
+        """
+        return True
+
+    def add_capture(self, name, capture):
+        """Capture some state whenever the players are paused here
+
+        :param str name: the name to find the result under, in the
+            :class:`pyvaldi.captures.Snapshot` of the checkpoint
+        :param capture: a callable, receiving the checkpoint. Runs
+            concurrently with the other captures (see :mod:`pyvaldi.captures`)
+        """
+        self.captures[name] = capture
+
+    def is_called(self, function):
+        """
+        :param function: a C function about to be called, or that returned
+        :rtype: bool
+        """
+        return False
 
     def _get_display_name(self):
         return u"'{}'".format(self.name) if self.name is not None else u''
@@ -98,4 +139,162 @@ class ImplicitCheckpoint(Checkpoint):
         return not self.before
 
 
-NULL_CHECKPOINT = NullCheckpoint(None, None, None)
\ No newline at end of file
+NULL_CHECKPOINT = NullCheckpoint(None, None, None)
+
+
+class SynchronizationCheckpoint(Checkpoint):
+    """Reached when a player just released a lock.
+
+    Such checkpoints aren't set by the user, they are created on the fly
+    when intercepting the primitives, once the release returned.
+    """
+    def __init__(self, player, primitive, name=None):
+        """
+        :param ProcessPlayer player: the player that released the lock
+        :param primitive: the lock released, directly or through the
+            condition or queue built on it
+        :param str | None name: the name of the operation
+        """
+        super(SynchronizationCheckpoint, self).__init__(
+            player, None, before=False, name=name)
+        self.primitive = primitive
+
+    def is_reached(self, code):
+        """Never set on a callable, so never reached by comparing code"""
+        return False
+
+    def __repr__(self):
+        return u"<Sync. CP {name}of {player} at {id}>".format(
+            name=self._get_display_name(), id=id(self), player=self.player)
+
+    __str__ = __repr__
+
+
+class OutputCheckpoint(Checkpoint):
+    """Reached when a subprocess writes a line matching a pattern"""
+    def __init__(self, player, pattern, streams, name=None):
+        """
+        :param pyvaldi.subprocesses.SubprocessPlayer player:
+        :param pattern: a compiled regular expression
+        :param tuple[str] streams: the names of the streams the line may be
+            written to: 'stdout' and/or 'stderr'
+        :param str | None name: The name of this checkpoint
+        """
+        super(OutputCheckpoint, self).__init__(player, None, name=name)
+        self.pattern = pattern
+        self.streams = streams
+
+    def is_reached(self, code):
+        """Not set on a callable, so never reached by comparing code"""
+        return False
+
+    def matches(self, stream, line):
+        """
+        :param str stream: 'stdout' or 'stderr'
+        :param str line: the line, without its line ending
+        :rtype: bool
+        """
+        return stream in self.streams and self.pattern.search(line) is not None
+
+    def __repr__(self):
+        return u"<Output CP {name}of {player} at {id}>".format(
+            name=self._get_display_name(), id=id(self), player=self.player)
+
+    __str__ = __repr__
+
+
+class InstanceCheckpoint(Checkpoint):
+    """Set on a method of a single instance: calls of the same method on
+    other instances don't reach it.
+
+    The instance is found in the first argument of the frames running the
+    method, only once their code matched. On Python 3.13+ reading it from
+    ``frame.f_locals`` doesn't build a dict of all the locals.
+    """
+    def __init__(self, player, callable_, before=False, name=None):
+        super(InstanceCheckpoint, self).__init__(
+            player, callable_, before, name)
+        self.receiver = callable_.__self__
+        self.receiver_name = callable_.__code__.co_varnames[0]
+
+    def is_reached_by(self, frame):
+        return frame.f_locals.get(self.receiver_name) is self.receiver
+
+    def __repr__(self):
+        return u"<CP {name}of {player} on {receiver!r} at {id}>".format(
+            name=self._get_display_name(), id=id(self), player=self.player,
+            receiver=self.receiver)
+
+    __str__ = __repr__
+
+
+def c_function_key(function):
+    """Return what identifies a C function, however it was reached.
+
+    Methods are bound anew every time they're looked up on an instance, so
+    they're identified by the method descriptor of their class instead.
+    Class methods, such as ``datetime.datetime.now``, are bound anew to
+    their class as well, so they're identified by the descriptor found in
+    the ``__dict__`` of the class defining them.
+
+    :param function: a builtin function, or a bound or unbound C method
+    """
+    owner = getattr(function, '__self__', None)
+    if owner is None or isinstance(owner, types.ModuleType):
+        return function
+    if isinstance(owner, type):
+        for klass in owner.__mro__:
+            descriptor = klass.__dict__.get(function.__name__)
+            if descriptor is not None:
+                return descriptor
+        return function
+    return getattr(type(owner), function.__name__, function)
+
+
+class CFunctionCheckpoint(Checkpoint):
+    """Set on a function implemented in C, such as ``socket.sendall`` or
+    ``sqlite3.Cursor.execute``, which has no code object to compare.
+
+    A checkpoint set on a method is reached by calls on any instance,
+    unless it's bound to the instance it was taken from.
+    """
+    def __init__(self, player, callable_, before=False, name=None,
+                 bound=False):
+        super(CFunctionCheckpoint, self).__init__(
+            player, callable_, before, name)
+        self.key = c_function_key(callable_)
+        self.receiver = callable_.__self__ if bound else None
+
+    def is_reached(self, code):
+        """C functions have no code, so never reached by comparing it"""
+        return False
+
+    def is_called(self, function):
+        return c_function_key(function) is self.key and (
+            self.receiver is None or function.__self__ is self.receiver)
+
+    def __repr__(self):
+        return u"<C CP {name}of {player} at {id}>".format(
+            name=self._get_display_name(), id=id(self), player=self.player)
+
+    __str__ = __repr__
+
+
+def create_checkpoint(player, callable_, before=False, name=None,
+                      bound=False):
+    """Return a checkpoint set on the callable, whether it's implemented in
+    Python or in C
+
+    :param bool bound: only reached by calls on the instance the method
+        was taken from, instead of on any instance
+    """
+    if bound and isinstance(getattr(callable_, '__self__', None),
+                            (type(None), types.ModuleType, type)):
+        raise ValueError(
+            "Only methods of instances can be bound, not {!r}".format(
+                callable_))
+    if hasattr(callable_, '__code__'):
+        if bound:
+            return InstanceCheckpoint(player, callable_, before, name)
+        return Checkpoint(player, callable_, before, name)
+    return CFunctionCheckpoint(player, callable_, before, name, bound)
@@ -0,0 +1,116 @@
+"""Players switched cooperatively on the conductor's own OS thread.
+
+Every player runs on a greenlet, and control is handed between the
+conductor and the players only at checkpoints. A handoff is a greenlet
+switch, instead of waking up an OS thread, and the order of execution is
+fully deterministic.
+
+Requires the ``greenlet`` package (``pip install pyvaldi[cooperative]``).
+"""
+import sys
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
+
+from pyvaldi.checkpoints import UnreachedCheckpoint
+from pyvaldi.profiler import RhythmProfiler
+from pyvaldi.thread import Instrument
+
+
+class InstrumentedGreenlet(Instrument):
+    """Plays the callable of a player on a greenlet, switching back to the
+    conductor when it has to wait for permission
+    """
+    def __init__(self, target=None, args=(), kwargs=None):
+        if greenlet is None:
+            raise ImportError(
+                "The cooperative mode requires the greenlet package")
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.profiler = RhythmProfiler()
+        self.greenlet = None
+        self.played = False  # whether the callable returned
+
+    def start(self):
+        # Created by the conductor, so it returns there once finished
+        self.greenlet = greenlet.greenlet(self.run)
+
+    def switch(self):
+        self.greenlet.switch()
+
+    def play_target(self):
+        self.target(*self.args, **self.kwargs)
+        self.played = True
+
+    def ended_before(self, checkpoint):
+        """Whether the player can no longer reach the checkpoint"""
+        return self.greenlet.dead or (
+            self.played and checkpoint is not self.terminal_checkpoint)
+
+
+class CooperativeBaton(object):
+    """Synchronizes players running on greenlets of the conductor's thread.
+
+    Waiting is done by switching to whoever can make progress: the player
+    of the checkpoint for the conductor, and the conductor for the players.
+    The profile function is global to the OS thread, so it is only set
+    while a player runs.
+    """
+    instrument_class = InstrumentedGreenlet
+    debug_log = None  # pyvaldi.debuglog.DebugLog
+
+    def __init__(self, checkpoint_order):
+        if greenlet is None:
+            raise ImportError(
+                "The cooperative mode requires the greenlet package")
+        self.checkpoint_order = checkpoint_order
+        self.permitted = set()
+        self.acknowledged = set()
+        self.conductor = greenlet.getcurrent()
+
+    def wait_for_permission(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('waits for permission', checkpoint)
+        if checkpoint in self.permitted:
+            return
+        while checkpoint not in self.permitted:
+            sys.setprofile(None)
+            # Players usually wait from inside the profile function. The
+            # interpreter would consider every other greenlet as being inside
+            # it too, and wouldn't profile them, unless switching this way.
+            sys.call_tracing(self.conductor.switch, ())
+        # Each greenlet tracks on its own whether profiling is enabled
+        sys.setprofile(checkpoint.player.instrument.profiler.profile)
+
+    def yield_permission(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('grants', checkpoint)
+        self.permitted.add(checkpoint)
+
+    def wait_acknowledgement(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('waits for acknowledgement', checkpoint)
+        player = checkpoint.player
+        instrument = player.instrument
+        while checkpoint not in self.acknowledged:
+            if instrument.ended_before(checkpoint):
+                # It would switch back right away, over and over. The
+                # conductor reports it, and can go on.
+                if getattr(player, 'error', None) is None:
+                    player.error = UnreachedCheckpoint(checkpoint)
+                self.acknowledged.add(checkpoint)
+                break
+            try:
+                instrument.switch()
+            finally:
+                # A player raising switches back here with its profile
+                # function still set
+                sys.setprofile(None)
+
+    def acknowledge_checkpoint(self, checkpoint):
+        if self.debug_log is not None:
+            self.debug_log.record('acknowledges', checkpoint)
+        self.acknowledged.add(checkpoint)
@@ -0,0 +1,90 @@
+"""A debug log of the synchronization of the players, cheap enough to leave
+on.
+
+With ``ProcessConductor(..., debug_log=DebugLog())`` the baton records who
+waits on, grants and acknowledges which checkpoint. Every thread appends to
+a buffer of its own, with a timestamp, and nothing else: no lock is taken
+and nothing is written out while the players run, so the interleavings
+observed stay the same.
+
+The buffers are merged in the order of their timestamps, and written out
+when the conductor reaches the end of the run, or when leaving a ``with``
+block because of an exception, such as a failed assertion::
+
+    with DebugLog() as debug_log:
+        conductor = ProcessConductor(players, checkpoints, debug_log=debug_log)
+        ...
+"""
+import heapq
+import sys
+import threading
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+
+class DebugLog(object):
+    """Per-thread, append-only buffers of timestamped events"""
+    def __init__(self, stream=None):
+        """
+        :param stream: where to write the log, sys.stderr by default
+        """
+        self.stream = stream
+        self.start = perf_counter()
+        self.local = threading.local()
+        self.buffers = []  # list[(thread name, list[(timestamp, event, cp)])]
+        self.flushed = {}  # {buffer index: how many entries were written}
+
+    def record(self, event, checkpoint):
+        """Append an event to the buffer of the current thread
+
+        :param str event: what the thread does
+        :param pyvaldi.checkpoints.Checkpoint checkpoint:
+        """
+        try:
+            buffer = self.local.buffer
+        except AttributeError:
+            buffer = self.local.buffer = []
+            self.buffers.append((threading.current_thread().name, buffer))
+        buffer.append((perf_counter(), event, checkpoint))
+
+    def entries(self, since_flush=False):
+        """Return the entries of all the threads, merged by timestamp
+
+        :param bool since_flush: only those not written out yet
+        :return: (timestamp, thread name, event, checkpoint) tuples
+        :rtype: list[tuple]
+        """
+        return self._collect(since_flush)[0]
+
+    def flush(self):
+        """Write out the entries recorded since the last flush"""
+        entries, ends = self._collect(since_flush=True)
+        self.flushed.update(ends)
+        stream = self.stream if self.stream is not None else sys.stderr
+        for timestamp, name, event, checkpoint in entries:
+            stream.write(u'{:10.6f} {:<20} {} {}\n'.format(
+                timestamp - self.start, name, event, checkpoint))
+        stream.flush()
+
+    def _collect(self, since_flush):
+        threads = []
+        ends = {}
+        for idx, (name, buffer) in enumerate(list(self.buffers)):
+            # Entries appended meanwhile are left for the next flush
+            ends[idx] = end = len(buffer)
+            start = self.flushed.get(idx, 0) if since_flush else 0
+            threads.append([(timestamp, name, event, checkpoint)
+                            for timestamp, event, checkpoint
+                            in buffer[start:end]])
+        return list(heapq.merge(*threads, key=lambda entry: entry[0])), ends
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.flush()
+        return False
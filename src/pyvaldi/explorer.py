@@ -0,0 +1,194 @@
+"""Exploration of the orders in which the checkpoints of a scenario can be
+reached.
+
+The :class:`Explorer` runs a :class:`Scenario` once for every interleaving of
+the checkpoints of its players, keeping the order of each player's own
+checkpoints. Orders are identified by their schedule: the positions of the
+players, in the order their checkpoints are reached.
+
+When the scenario can fingerprint its state, the explorer remembers the
+states it already went through, and doesn't explore the orders following a
+state a second time.
+"""
+from collections import OrderedDict
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+from pyvaldi import ProcessConductor
+
+
+class Scenario(object):
+    """A scenario that can be run repeatedly, in different orders.
+
+    Subclasses must implement :meth:`setup`, and may implement
+    :meth:`fingerprint` and :meth:`check`.
+    """
+    def setup(self):
+        """Create the state, the players and their checkpoints for one run
+
+        :return: a tuple of (players, checkpoints). The order of the
+            checkpoints only matters for those of the same player.
+        """
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """Return a cheap, hashable summary of the state the outcome depends
+        on, or None to explore every order.
+
+        Called whenever all the players are paused at their checkpoints.
+        """
+        return None
+
+    def check(self):
+        """Make assertions about the state, once all the players ended"""
+
+
+class LRUSet(object):
+    """A set holding at most `capacity` items, forgetting the least recently
+    used ones first
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def __contains__(self, item):
+        if item not in self.items:
+            return False
+        # move to the end, as the most recently used
+        self.items[item] = self.items.pop(item)
+        return True
+
+    def add(self, item):
+        self.items.pop(item, None)
+        self.items[item] = None
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class Explorer(object):
+    """Runs a scenario in every order of its checkpoints, depth first"""
+    def __init__(self, scenario, cache_size=100000, cooperative=False,
+                 results=None):
+        """
+        :param Scenario scenario:
+        :param int cache_size: how many states are remembered at most
+        :param bool cooperative: passed to the
+            :class:`pyvaldi.ProcessConductor`
+        :param pyvaldi.results.ResultsStore | None results: where to record
+            the timings and outcome of every run
+        """
+        self.scenario = scenario
+        self.cooperative = cooperative
+        self.results = results
+        self.visited = LRUSet(cache_size)
+
+        self.runs = 0
+        self.pruned = 0
+        self.failures = []  # list[(schedule, AssertionError)]
+
+    def explore(self, max_runs=None):
+        """Run the scenario in every order, except those known to lead
+        through the same states as orders already run.
+
+        :param int | None max_runs: stop after this many runs
+        :return: the failures, as (schedule, assertion error) tuples
+        :rtype: list[tuple]
+        """
+        prefixes = [()]
+        while prefixes and (max_runs is None or self.runs < max_runs):
+            prefixes.extend(self.run(prefixes.pop()))
+        return self.failures
+
+    def run(self, prefix):
+        """Run the scenario once, starting with the given prefix, and
+        completing it with the first players able to go on.
+
+        :param tuple prefix: the start of the schedule
+        :return: the prefixes branching off this run, still to be explored
+        :rtype: list[tuple]
+        """
+        players, checkpoints = self.scenario.setup()
+        sequences = [[cp for cp in checkpoints if cp.player is player]
+                     for player in players]
+        lengths = [len(sequence) for sequence in sequences]
+        schedule = complete_schedule(prefix, lengths)
+
+        positions = [0] * len(players)
+        order = []
+        for player in schedule:
+            order.append(sequences[player][positions[player]])
+            positions[player] += 1
+        conductor = ProcessConductor(
+            players, order, cooperative=self.cooperative)
+
+        branches = []
+        exploring = True
+        positions = [0] * len(players)
+        durations = []
+        for step, player in enumerate(schedule):
+            if exploring and step >= len(prefix):
+                exploring = self.visit(tuple(positions))
+                if exploring:
+                    branches.extend(
+                        schedule[:step] + (other,)
+                        for other in range(len(players))
+                        if other != player and positions[other] < lengths[other])
+            start = perf_counter()
+            next(conductor)
+            durations.append(perf_counter() - start)
+            positions[player] += 1
+
+        while conductor.next() is not None:
+            pass
+        self.runs += 1
+
+        failed = False
+        try:
+            self.scenario.check()
+        except AssertionError as error:
+            self.failures.append((schedule, error))
+            failed = True
+
+        if self.results is not None:
+            self.results.append(
+                [checkpoint.name for checkpoint in order], durations, failed)
+        return branches
+
+    def visit(self, positions):
+        """Remember the current state
+
+        :return: whether the orders following it still need exploring
+        :rtype: bool
+        """
+        fingerprint = self.scenario.fingerprint()
+        if fingerprint is None:
+            return True
+
+        state = (fingerprint, positions)
+        if state in self.visited:
+            self.pruned += 1
+            return False
+        self.visited.add(state)
+        return True
+
+
+def complete_schedule(prefix, lengths):
+    """Complete the schedule, letting the first player able to go on.
+
+    :param tuple prefix: the start of the schedule
+    :param list[int] lengths: how many checkpoints each player has
+    :rtype: tuple
+    """
+    remaining = list(lengths)
+    for player in prefix:
+        remaining[player] -= 1
+    completion = []
+    for player, count in enumerate(remaining):
+        completion.extend([player] * count)
+    return tuple(prefix) + tuple(completion)
@@ -0,0 +1,266 @@
+"""Systematic interleaving of players at their synchronization primitives.
+
+Instead of following a music sheet, the :class:`InterleavingConductor` lets
+one player run at a time, and pauses it each time it released a lock. A
+chooser then decides which of the paused players runs next.
+
+Players only need to be paused *after* releasing locks: whatever they do up
+to their next acquisition is local to them, so switching there or right
+before the acquisition is equivalent. This covers ``with lock:`` blocks,
+explicit ``Lock.acquire()`` / ``release()`` calls, ``Condition.wait`` (which
+releases the lock before blocking), and everything built on top of them,
+like ``queue.Queue.get``.
+"""
+import random
+import sys
+import threading
+
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+from pyvaldi.checkpoints import (
+    CFunctionCheckpoint, SynchronizationCheckpoint, c_function_key)
+
+LOCK_TYPES = frozenset([type(threading.Lock()), type(threading.RLock())])
+RELEASE_METHODS = frozenset(['release', '__exit__', '_release_save'])
+
+
+class RandomChooser(object):
+    """Gives the turn to a random player"""
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def __call__(self, candidates):
+        """
+        :param list[int] candidates: the positions of the waiting players,
+            in ascending order
+        :rtype: int
+        """
+        return self.random.choice(candidates)
+
+
+class ReplayChooser(object):
+    """Gives the turns in the order of a recorded schedule"""
+    def __init__(self, schedule, fallback=None):
+        """
+        :param list[int] schedule: player positions, as recorded in
+            :attr:`InterleavingConductor.schedule`
+        :param fallback: the chooser used once the schedule is exhausted,
+            or when the scheduled player isn't waiting. Defaults to the
+            first waiting player.
+        """
+        self.schedule = list(schedule)
+        self.position = 0
+        self.fallback = fallback
+
+    def __call__(self, candidates):
+        if self.position < len(self.schedule):
+            chosen = self.schedule[self.position]
+            self.position += 1
+            if chosen in candidates:
+                return chosen
+        if self.fallback is not None:
+            return self.fallback(candidates)
+        return candidates[0]
+
+
+class TurnBaton(object):
+    """Passes the turns between the conductor and the players"""
+    def __init__(self):
+        self.arrivals = Queue()
+
+    def wait_for_permission(self, checkpoint, turn):
+        """Announce the checkpoint was reached, and wait for the turn
+
+        :param threading.Event turn: the event of the waiting player
+        """
+        turn.clear()
+        self.arrivals.put((checkpoint, turn))
+        turn.wait()
+
+    def finish(self, checkpoint):
+        self.arrivals.put((checkpoint, None))
+
+
+class SchedulingProfiler(object):
+    """Pauses the player after it released a lock, and at its checkpoints"""
+    def __init__(self, player, baton, checkpoints=()):
+        """
+        :param ProcessPlayer player:
+        :param TurnBaton baton:
+        :param list[pyvaldi.checkpoints.Checkpoint] checkpoints: regular
+            checkpoints of the player, paused at each time they're reached
+        """
+        self.player = player
+        self.baton = baton
+        self.turn = threading.Event()
+        # Several checkpoints may share a code or a function, when bound to
+        # different instances
+        self.before_codes = {}  # {code: list[Checkpoint]}
+        self.after_codes = {}  # {code: list[Checkpoint]}
+        self.before_functions = {}  # {C function key: list[Checkpoint]}
+        self.after_functions = {}  # {C function key: list[Checkpoint]}
+        for cp in checkpoints:
+            if isinstance(cp, CFunctionCheckpoint):
+                functions = (self.before_functions if cp.before
+                             else self.after_functions)
+                functions.setdefault(cp.key, []).append(cp)
+            else:
+                codes = self.before_codes if cp.before else self.after_codes
+                codes.setdefault(cp.callable.__code__, []).append(cp)
+
+    def profile(self, frame, action_string, arg):
+        if action_string == 'c_return':
+            if (arg.__name__ in RELEASE_METHODS and
+                    type(arg.__self__) in LOCK_TYPES):
+                self.pause_after_release(arg)
+            elif self.after_functions:
+                self.pause_at_function(self.after_functions, arg)
+        elif action_string == 'c_exception':
+            if self.after_functions:
+                self.pause_at_function(self.after_functions, arg)
+        elif action_string == 'c_call':
+            if self.before_functions:
+                self.pause_at_function(self.before_functions, arg)
+        elif action_string == 'call':
+            if frame.f_code in self.before_codes:
+                self.pause_at_code(self.before_codes, frame)
+        elif action_string == 'return':
+            if frame.f_code in self.after_codes:
+                self.pause_at_code(self.after_codes, frame)
+
+    def pause_at_code(self, codes, frame):
+        for checkpoint in codes[frame.f_code]:
+            if checkpoint.is_reached_by(frame):
+                self.baton.wait_for_permission(checkpoint, self.turn)
+                return
+
+    def pause_at_function(self, functions, function):
+        for checkpoint in functions.get(c_function_key(function), ()):
+            if checkpoint.is_called(function):
+                self.baton.wait_for_permission(checkpoint, self.turn)
+                return
+
+    def pause_after_release(self, method):
+        primitive = method.__self__
+        name = u'{}.{}'.format(type(primitive).__name__, method.__name__)
+        self.baton.wait_for_permission(
+            SynchronizationCheckpoint(self.player, primitive, name), self.turn)
+
+
+class SchedulingThread(threading.Thread):
+    """Plays the callable of a player, pausing as the profiler directs"""
+    def __init__(self, player, baton, checkpoints=()):
+        super(SchedulingThread, self).__init__(
+            target=player.target, args=player.args, kwargs=player.kwargs)
+        self.player = player
+        self.baton = baton
+        self.profiler = SchedulingProfiler(player, baton, checkpoints)
+        self.daemon = True
+
+    def run(self):
+        # The baton uses locks as well, so profile strictly the callable
+        self.baton.wait_for_permission(
+            self.player.get_initial_checkpoint(), self.profiler.turn)
+        sys.setprofile(self.profiler.profile)
+        try:
+            super(SchedulingThread, self).run()
+        finally:
+            sys.setprofile(None)
+            self.baton.finish(self.player.get_terminal_checkpoint())
+
+
+class InterleavingConductor(object):
+    """Runs the players one at a time, switching between them only when one
+    of them released a lock, or reached one of the given checkpoints
+    """
+    def __init__(self, players, checkpoints=(), chooser=None, quantum=0.1):
+        """
+        :param list[ProcessPlayer] players: a list of process players
+        :param list[pyvaldi.checkpoints.Checkpoint] checkpoints: regular
+            checkpoints, which also pause the players. Their order is
+            irrelevant.
+        :param chooser: callable receiving the positions of the waiting
+            players, and returning the one to run next.
+            Defaults to a :class:`RandomChooser`.
+        :param float quantum: seconds after which the running player is
+            considered blocked (for instance on an empty queue), and another
+            one is given the turn
+        """
+        self.players = players
+        self.chooser = chooser if chooser is not None else RandomChooser()
+        self.quantum = quantum
+
+        self.baton = TurnBaton()
+        self.schedule = []  # positions of the players given the turn
+        self.waiting = {}  # {player position: (Checkpoint, turn Event)}
+        self.positions = dict(
+            (player, position) for position, player in enumerate(players))
+        self.playing = len(players)
+
+        self.threads = [
+            SchedulingThread(
+                player, self.baton,
+                [cp for cp in checkpoints if cp.player is player])
+            for player in players]
+        for thread in self.threads:
+            thread.start()
+
+        # Start only once all the players are waiting, for reproducibility
+        while len(self.waiting) < len(players):
+            checkpoint, turn = self.baton.arrivals.get()
+            self.waiting[self.positions[checkpoint.player]] = (
+                checkpoint, turn)
+
+    def give_turn(self):
+        position = self.chooser(sorted(self.waiting))
+        self.schedule.append(position)
+        _, turn = self.waiting.pop(position)
+        turn.set()
+
+    def next(self):
+        """Let one of the waiting players run, until a player pauses again.
+
+        :return: the checkpoint where the player paused, or None when all the
+            players ended
+        :rtype: pyvaldi.checkpoints.Checkpoint | None
+        """
+        if self.waiting:
+            self.give_turn()
+
+        while self.playing:
+            try:
+                checkpoint, turn = self.baton.arrivals.get(
+                    timeout=self.quantum)
+            except Empty:
+                # The running player is blocked, most likely by a waiting one
+                if self.waiting:
+                    self.give_turn()
+                continue
+
+            if turn is None:
+                self.playing -= 1
+                if self.waiting:
+                    self.give_turn()
+                continue
+
+            self.waiting[self.positions[checkpoint.player]] = (
+                checkpoint, turn)
+            return checkpoint
+
+    __next__ = next
+
+    def __iter__(self):
+        return self
+
+    def finish(self):
+        """Run the players until all of them ended.
+
+        :return: the schedule followed
+        :rtype: list[int]
+        """
+        while self.next() is not None:
+            pass
+        return self.schedule
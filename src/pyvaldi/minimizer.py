@@ -0,0 +1,222 @@
+"""Minimization of the checkpoint orders a scenario fails in.
+
+The :class:`Minimizer` takes a failing order of a
+:class:`pyvaldi.explorer.Scenario`, and looks for the smallest part of it
+that still fails, by delta debugging. Dropping a checkpoint from the order
+drops both the pause and the ordering constraints it took part in: the
+player runs through it, in the same step as its previous checkpoint.
+
+Orders are made of steps, ``(player, position)`` pairs: the index of a
+player in the scenario, and the index of a checkpoint among those of the
+player. Every candidate order is run through a fresh
+:class:`pyvaldi.ProcessConductor`, those of a round in parallel, across a
+process pool. The scenario is thus pickled, and set up again for every run.
+The outcome of the orders already run is remembered, so none is run twice.
+
+Every player needs a checkpoint to be conducted, so the orders leaving a
+player without one aren't run, they're considered as passing.
+
+Dropping a checkpoint can also make a player wait forever, on another one
+that's held before what it waits for. Every run thus has a deadline, and
+the orders running past it are considered as passing too.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from pyvaldi import ProcessConductor
+
+
+def run_order(scenario, steps, cooperative=False, timeout=None):
+    """Run the scenario once, in the given order
+
+    The conductor is driven by a thread of its own, so that a run stuck
+    past the deadline can be given up on. Its threads, daemons like those
+    of the players, are then left behind.
+
+    :param pyvaldi.explorer.Scenario scenario:
+    :param tuple steps: the order, as (player, position) pairs
+    :param bool cooperative: passed to the :class:`pyvaldi.ProcessConductor`
+    :param float | None timeout: how many seconds the run may take
+    :return: whether the scenario's check failed, None if the run didn't
+        end in time
+    :rtype: bool | None
+    """
+    players, checkpoints = scenario.setup()
+    sequences = [[cp for cp in checkpoints if cp.player is player]
+                 for player in players]
+    order = [sequences[player][position] for player, position in steps]
+    errors = []
+
+    def conduct():
+        try:
+            # Greenlets can only be switched to by the thread creating them
+            conductor = ProcessConductor(
+                players, order, cooperative=cooperative)
+            while conductor.next() is not None:
+                pass
+        except Exception as error:
+            errors.append(error)
+
+    driver = threading.Thread(target=conduct, name='minimizer run')
+    driver.daemon = True
+    driver.start()
+    driver.join(timeout)
+    if driver.is_alive():
+        return None
+    if errors:
+        raise errors[0]
+
+    try:
+        scenario.check()
+    except AssertionError:
+        return True
+    return False
+
+
+def schedule_steps(schedule):
+    """Turn a schedule of the :class:`pyvaldi.explorer.Explorer` into steps
+
+    :param tuple schedule: the players, in the order their checkpoints are
+        reached
+    :rtype: tuple
+    """
+    positions = {}
+    steps = []
+    for player in schedule:
+        position = positions.get(player, 0)
+        steps.append((player, position))
+        positions[player] = position + 1
+    return tuple(steps)
+
+
+def split(steps, parts):
+    """Split the steps into that many parts of (almost) equal lengths"""
+    size, extra = divmod(len(steps), parts)
+    chunks = []
+    start = 0
+    for idx in range(parts):
+        end = start + size + (1 if idx < extra else 0)
+        chunks.append(steps[start:end])
+        start = end
+    return chunks
+
+
+class Minimizer(object):
+    """Finds a smallest order a scenario still fails in"""
+    def __init__(self, scenario, processes=None, cooperative=False,
+                 mp_context=None, timeout=10.0):
+        """
+        :param pyvaldi.explorer.Scenario scenario: a picklable scenario
+        :param int | None processes: how many orders run at once, as many as
+            there are CPUs by default. With 0, they run one by one, in this
+            process, and the scenario needn't be picklable.
+        :param bool cooperative: passed to the
+            :class:`pyvaldi.ProcessConductor`
+        :param mp_context: the :mod:`multiprocessing` context starting the
+            processes, the default one if None
+        :param float | None timeout: how many seconds every order may run.
+            The orders running longer are considered as passing. Their
+            stuck players are left behind when running in this process,
+            the processes running them are replaced otherwise.
+        """
+        self.scenario = scenario
+        self.processes = os.cpu_count() if processes is None else processes
+        self.cooperative = cooperative
+        self.mp_context = mp_context
+        self.timeout = timeout
+        self.outcomes = {}  # {steps: whether they fail}
+
+        self.players = None
+        self.pool = None
+        self.runs = 0
+        self.cached = 0
+        self.timeouts = 0
+
+    def minimize(self, schedule):
+        """Return a smallest failing order, made of steps of the schedule
+
+        The result is 1-minimal: dropping any one of its steps makes it pass.
+
+        :param tuple schedule: a failing schedule, as found by the
+            :class:`pyvaldi.explorer.Explorer`
+        :return: the steps of the order, as (player, position) pairs
+        :rtype: tuple
+        """
+        steps = schedule_steps(schedule)
+        self.players = len(set(schedule))
+
+        if self.processes:
+            self.pool = ProcessPoolExecutor(self.processes, self.mp_context)
+        try:
+            if not self.fail([steps])[0]:
+                raise ValueError("The scenario doesn't fail in that order")
+            return self.reduce(steps)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+    def reduce(self, steps):
+        granularity = 2
+        while len(steps) >= 2:
+            chunks = split(steps, granularity)
+            complements = [
+                tuple(step for step in steps if step not in chunk)
+                for chunk in chunks]
+            candidates = chunks + complements
+            failed = self.fail(candidates)
+
+            if any(failed[:granularity]):
+                steps = candidates[failed.index(True)]
+                granularity = 2
+            elif any(failed):
+                steps = candidates[failed.index(True)]
+                granularity = max(granularity - 1, 2)
+            elif granularity < len(steps):
+                granularity = min(granularity * 2, len(steps))
+            else:
+                break
+        return steps
+
+    def fail(self, candidates):
+        """Run the candidate orders not run yet, in parallel
+
+        :param list[tuple] candidates:
+        :return: whether each of them fails
+        :rtype: list[bool]
+        """
+        args = (self.cooperative, self.timeout)
+        runs = {}
+        for steps in candidates:
+            if steps in self.outcomes or steps in runs:
+                self.cached += 1
+            elif len(set(player for player, _ in steps)) < self.players:
+                self.outcomes[steps] = False
+            elif self.pool is None:
+                runs[steps] = run_order(self.scenario, steps, *args)
+            else:
+                runs[steps] = self.pool.submit(
+                    run_order, self.scenario, steps, *args)
+
+        timeouts = self.timeouts
+        for steps, outcome in runs.items():
+            if self.pool is not None:
+                outcome = outcome.result()
+            if outcome is None:
+                self.timeouts += 1
+            self.runs += 1
+            self.outcomes[steps] = bool(outcome)
+        if self.pool is not None and self.timeouts > timeouts:
+            self.recycle()
+        return [self.outcomes[steps] for steps in candidates]
+
+    def recycle(self):
+        """Replace the processes of the pool, that may have players stuck
+        in them
+        """
+        # ProcessPoolExecutor has no public way to stop its processes
+        for process in list(self.pool._processes.values()):
+            process.terminate()
+        self.pool.shutdown(wait=False)
+        self.pool = ProcessPoolExecutor(self.processes, self.mp_context)
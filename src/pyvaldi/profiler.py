@@ -1,4 +1,13 @@
+C_RETURN_EVENTS = frozenset(['c_return', 'c_exception'])
+
+
 class RhythmProfiler(object):
+    """Stops its player at its checkpoints, one after the other.
+
+    Profile functions are set per thread, so a profiler is only ever called
+    on its player's thread, and its index needs no lock. It's configured by
+    the conductor before the player starts.
+    """
     def __init__(self):
         self.baton = None
         self.checkpoints = None
@@ -10,25 +19,32 @@ class RhythmProfiler(object):
 
         current_cp = self.checkpoints[self.checkpoint_idx]
 
-        # log_lock.acquire()
-        # thread = threading.current_thread()
-        # print("PROFILER: {} func: {} action: {}".format(thread.name, frame.f_code.co_name, action_string))
-        # log_lock.release()
-        print(frame.f_code.co_name, action_string)
-
-        if (action_string == 'call' and current_cp.before or
-                action_string == 'return' and not current_cp.before):
-            if current_cp.is_reached(frame.f_code):
-                self.baton.wait_for_permission(current_cp)
-                self.baton.acknowledge_checkpoint(current_cp)
-                # print('asdf', current_cp)
-                # import  time; time.sleep(1)
-
-                self.checkpoint_idx += 1
-                if self.checkpoint_idx >= len(self.checkpoints):
-                    return
-
-                self.baton.wait_for_permission(self.checkpoints[self.checkpoint_idx])
+        if current_cp.before:
+            if action_string == 'call':
+                reached = (current_cp.is_reached(frame.f_code) and
+                           current_cp.is_reached_by(frame))
+            else:
+                reached = (action_string == 'c_call' and
+                           current_cp.is_called(whatever))
+        elif action_string == 'return':
+            reached = (current_cp.is_reached(frame.f_code) and
+                       current_cp.is_reached_by(frame))
+        else:
+            # a C function that raised returns as well
+            reached = (action_string in C_RETURN_EVENTS and
+                       current_cp.is_called(whatever))
+
+        if reached:
+            self.baton.wait_for_permission(current_cp)
+            self.baton.acknowledge_checkpoint(current_cp)
+            # print('asdf', current_cp)
+            # import  time; time.sleep(1)
+
+            self.checkpoint_idx += 1
+            if self.checkpoint_idx >= len(self.checkpoints):
+                return
+
+            self.baton.wait_for_permission(self.checkpoints[self.checkpoint_idx])
 
     # def __call__(self, frame, action_string, dunno):
     #     if self.checkpoint_idx >= len(self.confirming_checkpoints):
@@ -0,0 +1,328 @@
+"""Players hosted in processes other than the conductor's.
+
+The conductor's process runs a :class:`ConductorServer`, and hands the
+:class:`RemotePlayer` objects it creates to a regular
+:class:`pyvaldi.ProcessConductor`. Every other process runs a
+:class:`PlayerAgent`, which connects to the server and plays its callable,
+pausing at the checkpoints the conductor grants it.
+
+Both sides keep one persistent connection per player, over which they
+exchange fixed size frames::
+
+    opcode (1 byte) | argument (4 bytes, unsigned, network order) | payload
+
+Only HELLO and SCORE frames carry a payload, and their argument is its
+length. For GRANT and ARRIVED frames the argument is the position of a
+checkpoint in the sequence of checkpoints of that player.
+"""
+import socket
+import struct
+import threading
+
+from pyvaldi.checkpoints import (
+    Checkpoint, ImplicitCheckpoint, create_checkpoint)
+from pyvaldi.thread import InstrumentedThread
+
+HELLO = 1    # agent -> conductor: the name of the hosted player
+SCORE = 2    # conductor -> agent: the names of the player's checkpoints
+GRANT = 3    # conductor -> agent: the player may run until a checkpoint
+ARRIVED = 4  # agent -> conductor: the player reached a checkpoint
+
+_HEADER = struct.Struct('!BI')
+_PAYLOAD_OPCODES = (HELLO, SCORE)
+
+
+class ProtocolError(Exception):
+    """Raised when the other end sends an unexpected frame"""
+
+
+def _create_socket(address):
+    """Return a socket suited for the given address.
+
+    :param str | tuple address: a path for a unix socket, or a
+        (host, port) tuple for a TCP socket
+    """
+    if isinstance(address, tuple):
+        return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+
+class Channel(object):
+    """One end of a persistent, framed connection"""
+    def __init__(self, sock):
+        if sock.family == socket.AF_INET:
+            # Frames are tiny, and every one of them is waited on
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.rfile = sock.makefile('rb')
+
+    def send(self, opcode, argument=0, payload=b''):
+        if opcode in _PAYLOAD_OPCODES:
+            argument = len(payload)
+        self.sock.sendall(_HEADER.pack(opcode, argument) + payload)
+
+    def receive(self):
+        """Block until a whole frame arrived.
+
+        :return: a tuple of (opcode, argument, payload)
+        """
+        header = self.rfile.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise EOFError("Connection closed by the other end")
+        opcode, argument = _HEADER.unpack(header)
+
+        payload = b''
+        if opcode in _PAYLOAD_OPCODES:
+            payload = self.rfile.read(argument)
+            if len(payload) < argument:
+                raise EOFError("Connection closed by the other end")
+        return opcode, argument, payload
+
+    def expect(self, opcode):
+        """Receive a frame, making sure it has the given opcode
+
+        :return: a tuple of (argument, payload)
+        """
+        received, argument, payload = self.receive()
+        if received != opcode:
+            raise ProtocolError(
+                "Expected opcode {}, received {}".format(opcode, received))
+        return argument, payload
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+class ConductorServer(object):
+    """Accepts connections from the :class:`PlayerAgent` objects, on behalf
+    of the conductor
+    """
+    def __init__(self, address, backlog=16, accept_timeout=60.0):
+        """
+        :param str | tuple address: a path for a unix socket, or a
+            (host, port) tuple. Use port 0 to pick a free port.
+        :param int backlog: how many agents may wait to be accepted
+        :param float | None accept_timeout: how many seconds to wait for
+            an agent to connect, before giving up on its player
+        """
+        self.accept_timeout = accept_timeout
+        self.listener = _create_socket(address)
+        self.listener.settimeout(accept_timeout)
+        if isinstance(address, tuple):
+            self.listener.setsockopt(
+                socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(address)
+        self.listener.listen(backlog)
+        self.address = self.listener.getsockname()
+
+        self.channels = {}  # {player name: Channel}
+        self.accept_lock = threading.Lock()
+
+    def player(self, name):
+        """Create and return the player, hosted by the agent with this name"""
+        return RemotePlayer(self, name)
+
+    def accept_player(self, name):
+        """Block until the agent hosting the named player connected
+
+        :rtype: Channel
+        """
+        with self.accept_lock:
+            while name not in self.channels:
+                try:
+                    sock, _ = self.listener.accept()
+                except socket.timeout:
+                    raise socket.timeout(
+                        "The agent hosting {} didn't connect within {} "
+                        "seconds".format(name, self.accept_timeout))
+                sock.settimeout(None)
+                channel = Channel(sock)
+                _, payload = channel.expect(HELLO)
+                self.channels[payload.decode('utf-8')] = channel
+            return self.channels.pop(name)
+
+    def close(self):
+        self.listener.close()
+
+
+class RemotePlayer(object):
+    """Stands for a player hosted by a :class:`PlayerAgent`.
+
+    Checkpoints are identified by name only, the agent is responsible for
+    mapping them to callables.
+    """
+    def __init__(self, server, name):
+        """
+        :param ConductorServer server: the server the agent connects to
+        :param str name: the name the agent registers with
+        """
+        self.server = server
+        self.name = name
+        self.music_sheet = None
+        self._terminal_checkpoint = ImplicitCheckpoint(self, None)
+        self._initial_checkpoint = ImplicitCheckpoint(self, None, before=True)
+        self.relay = None
+        self.error = None  # what stopped relaying, re-raised by the conductor
+
+    def add_checkpoint_after(self, name):
+        """Create and return a checkpoint, set AFTER the named callable of
+        the agent returns
+        """
+        return Checkpoint(self, None, name=name)
+
+    def add_checkpoint_before(self, name):
+        """Create and return a checkpoint, set BEFORE the named callable of
+        the agent is called
+        """
+        return Checkpoint(self, None, before=True, name=name)
+
+    def get_terminal_checkpoint(self):
+        """Returns a checkpoint that marks the process end"""
+        return self._terminal_checkpoint
+
+    def get_initial_checkpoint(self):
+        """Return the initial checkpoint, that marks the process beginning"""
+        return self._initial_checkpoint
+
+    def play(self, player_checkpoints, baton):
+        self.music_sheet = player_checkpoints
+        self.relay = threading.Thread(
+            target=self.relay_checkpoints, args=(player_checkpoints, baton))
+        self.relay.daemon = True
+        self.relay.start()
+
+    def relay_checkpoints(self, checkpoints, baton):
+        """Forward the permissions of the baton to the agent, and its
+        acknowledgements back to the baton.
+
+        If the agent doesn't connect, misbehaves or disconnects, the error
+        is kept in :attr:`error`, and the remaining checkpoints are
+        acknowledged as soon as they're granted. The conductor thus doesn't
+        wait forever, and re-raises the error.
+        """
+        channel = None
+        acknowledged = 0
+        try:
+            channel = self.server.accept_player(self.name)
+            names = u'\n'.join(cp.name for cp in checkpoints[1:-1])
+            channel.send(SCORE, payload=names.encode('utf-8'))
+
+            for position, checkpoint in enumerate(checkpoints):
+                baton.wait_for_permission(checkpoint)
+                channel.send(GRANT, position)
+                arrived, _ = channel.expect(ARRIVED)
+                if arrived != position:
+                    raise ProtocolError(
+                        "{} arrived at checkpoint {} instead of {}".format(
+                            self, arrived, position))
+                baton.acknowledge_checkpoint(checkpoint)
+                acknowledged += 1
+        except Exception as error:
+            self.error = error
+            for checkpoint in checkpoints[acknowledged:]:
+                baton.wait_for_permission(checkpoint)
+                baton.acknowledge_checkpoint(checkpoint)
+        finally:
+            if channel is not None:
+                channel.close()
+
+    def __repr__(self):
+        return u"<RemotePlayer {}>".format(self.name)
+
+    __str__ = __repr__
+
+
+class RemoteBaton(object):
+    """Agent side replacement of the :class:`pyvaldi.Baton`.
+
+    A player reaches its checkpoints strictly in order, so only its
+    position in the sequence is tracked, not the checkpoints themselves.
+    """
+    def __init__(self, channel):
+        self.channel = channel
+        self.position = 0
+        self.granted_position = -1
+
+    def wait_for_permission(self, checkpoint):
+        while self.granted_position < self.position:
+            self.granted_position, _ = self.channel.expect(GRANT)
+
+    def acknowledge_checkpoint(self, checkpoint):
+        self.channel.send(ARRIVED, self.position)
+        self.position += 1
+
+
+class PlayerAgent(object):
+    """Hosts a player in a process other than the conductor's"""
+    def __init__(self, address, callable_, name,
+                 *args_for_callable, **kwargs_for_callable):
+        """
+        :param str | tuple address: the address of the
+            :class:`ConductorServer`
+        :param callable_:
+        :param str name: the name of the :class:`RemotePlayer` this agent
+            hosts
+        :param args_for_callable:
+        :param kwargs_for_callable:
+        """
+        self.address = address
+        self.name = name
+        self.checkpoints = {}  # {name: Checkpoint}
+        self._terminal_checkpoint = ImplicitCheckpoint(self, None)
+        self._initial_checkpoint = ImplicitCheckpoint(self, None, before=True)
+        self.instrument = InstrumentedThread(
+            target=callable_, args=args_for_callable,
+            kwargs=kwargs_for_callable)
+
+    def add_checkpoint_after(self, callable_, name=None, bound=False):
+        """Register the callable for the checkpoints with this name, that
+        are set AFTER it returns
+        """
+        return self._add_checkpoint(callable_, False, name, bound)
+
+    def add_checkpoint_before(self, callable_, name=None, bound=False):
+        """Register the callable for the checkpoints with this name, that
+        are set BEFORE it is called
+        """
+        return self._add_checkpoint(callable_, True, name, bound)
+
+    def _add_checkpoint(self, callable_, before, name, bound):
+        if name is None:
+            name = callable_.__name__
+        if name in self.checkpoints:
+            raise ValueError(
+                "{} already has a checkpoint named {!r}, name this one "
+                "explicitly".format(self, name))
+        checkpoint = create_checkpoint(
+            self, callable_, before=before, name=name, bound=bound)
+        self.checkpoints[name] = checkpoint
+        return checkpoint
+
+    def run(self):
+        """Connect to the conductor, and play the callable as directed.
+
+        Blocks until the callable returned.
+        """
+        sock = _create_socket(self.address)
+        sock.connect(self.address)
+        channel = Channel(sock)
+        try:
+            channel.send(HELLO, payload=self.name.encode('utf-8'))
+            _, payload = channel.expect(SCORE)
+            names = payload.decode('utf-8').split(u'\n') if payload else []
+
+            self.instrument.tune(
+                RemoteBaton(channel),
+                [self._initial_checkpoint] +
+                [self.checkpoints[name] for name in names] +
+                [self._terminal_checkpoint])
+            self.instrument.start()
+            self.instrument.join()
+        finally:
+            channel.close()
+
+    def __repr__(self):
+        return u"<PlayerAgent {}>".format(self.name)
+
+    __str__ = __repr__
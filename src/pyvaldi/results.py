@@ -0,0 +1,179 @@
+"""Columnar storage of the results of many runs of a scenario.
+
+A :class:`ResultsStore` keeps one row per run, in NumPy arrays preallocated
+and grown a chunk at a time, so that millions of runs can be recorded and
+summarized without building Python objects for each of them. Checkpoints
+are identified by name, since every run creates new checkpoint objects.
+
+For each run, it stores:
+
+* ``durations``: the seconds it took to reach each checkpoint, since the
+  previous one was reached (NaN when it wasn't reached)
+* ``orders``: the columns of the checkpoints, in the order they were reached
+  (padded with -1)
+* ``failed``: whether the run failed its checks
+
+Requires the ``numpy`` package (``pip install pyvaldi[results]``).
+"""
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ARRAYS = ('durations', 'orders', 'failed')
+
+
+class ResultsStore(object):
+    """Results of runs of the same scenario, one row per run"""
+    def __init__(self, names, chunk_size=4096):
+        """
+        :param list[str] names: the names of the checkpoints of the scenario
+        :param int chunk_size: how many rows to grow the arrays by
+        """
+        if numpy is None:
+            raise ImportError("The results store requires the numpy package")
+        self.names = list(names)
+        self.columns = dict((name, idx) for idx, name in enumerate(names))
+        if len(self.columns) != len(self.names):
+            raise ValueError("Checkpoint names must be unique")
+        self.chunk_size = chunk_size
+        self.size = 0
+
+        width = len(self.names)
+        self.durations = numpy.full((0, width), numpy.nan)
+        self.orders = numpy.full((0, width), -1, dtype=numpy.int32)
+        self.failed = numpy.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = len(self.failed) + self.chunk_size
+        width = len(self.names)
+        durations = numpy.full((capacity, width), numpy.nan)
+        durations[:self.size] = self.durations[:self.size]
+        orders = numpy.full((capacity, width), -1, dtype=numpy.int32)
+        orders[:self.size] = self.orders[:self.size]
+        failed = numpy.zeros(capacity, dtype=bool)
+        failed[:self.size] = self.failed[:self.size]
+        self.durations, self.orders, self.failed = durations, orders, failed
+
+    def append(self, names, durations, failed=False):
+        """Record one run
+
+        :param list[str] names: the names of the checkpoints reached, in the
+            order they were reached
+        :param list[float] durations: the seconds it took to reach each of
+            them, since the previous one
+        :param bool failed: whether the run failed its checks
+        """
+        columns = self._columns(names)
+        if self.size == len(self.failed):
+            self._grow()
+        row = self.size
+        self.orders[row, :len(columns)] = columns
+        self.durations[row, columns] = durations
+        self.failed[row] = failed
+        self.size += 1
+
+    def _columns(self, names):
+        try:
+            columns = [self.columns[name] for name in names]
+        except KeyError as error:
+            raise ValueError(
+                "The checkpoint {!r} isn't one of the store's. Checkpoints "
+                "are recorded by name, so they all need a unique "
+                "one".format(error.args[0]))
+        if len(set(columns)) != len(columns):
+            raise ValueError(
+                "Several checkpoints reached were named the same: "
+                "{}".format(names))
+        return columns
+
+    def record_run(self, conductor, check=None):
+        """Run the conductor until the players ended, and record the run
+
+        :param pyvaldi.ProcessConductor conductor:
+        :param check: a callable raising AssertionError when the run failed
+        :return: whether the run failed
+        """
+        names = []
+        durations = []
+        previous = perf_counter()
+        for checkpoint in iter(conductor.next, None):
+            now = perf_counter()
+            names.append(checkpoint.name)
+            durations.append(now - previous)
+            previous = now
+
+        failed = False
+        if check is not None:
+            try:
+                check()
+            except AssertionError:
+                failed = True
+        self.append(names, durations, failed)
+        return failed
+
+    def view(self, array):
+        """Return the filled rows of one of the arrays"""
+        return getattr(self, array)[:self.size]
+
+    def save(self, path):
+        """Save the results to a .npz file"""
+        arrays = dict((array, self.view(array)) for array in ARRAYS)
+        numpy.savez_compressed(path, names=numpy.array(self.names), **arrays)
+
+    @classmethod
+    def load(cls, path, chunk_size=4096):
+        """Load the results saved to a .npz file"""
+        with numpy.load(path) as data:
+            store = cls([str(name) for name in data['names']], chunk_size)
+            store.durations = data['durations']
+            store.orders = data['orders']
+            store.failed = data['failed']
+        store.size = len(store.failed)
+        return store
+
+    def percentiles(self, q=(50, 90, 99)):
+        """Return the percentiles of the durations of each checkpoint
+
+        :param q: the percentiles to compute
+        :return: an array of shape (len(q), number of checkpoints)
+        """
+        return numpy.nanpercentile(self.view('durations'), q, axis=0)
+
+    def totals(self):
+        """Return how long each run took to reach all its checkpoints"""
+        return numpy.nansum(self.view('durations'), axis=1)
+
+    def slowest(self, count=10):
+        """Return the rows of the slowest runs, slowest first"""
+        return numpy.argsort(-self.totals(), kind='stable')[:count]
+
+    def failure_rate(self):
+        if not self.size:
+            return 0.0
+        return float(self.view('failed').mean())
+
+    def failure_clusters(self):
+        """Group the runs by the order their checkpoints were reached in,
+        most failing groups first
+
+        :return: a tuple of (orders, runs, failures) arrays, with one row
+            per distinct order
+        """
+        orders, inverse = numpy.unique(
+            self.view('orders'), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        runs = numpy.bincount(inverse, minlength=len(orders))
+        failures = numpy.bincount(
+            inverse, weights=self.view('failed'), minlength=len(orders))
+        failures = failures.astype(numpy.int64)
+        ranking = numpy.lexsort((-runs, -failures))
+        return orders[ranking], runs[ranking], failures[ranking]
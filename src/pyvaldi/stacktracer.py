@@ -1,74 +1,112 @@
 """
-Vlad: This whole module was copied from here:
- http://code.activestate.com/recipes/577334-how-to-debug-deadlocked-multi
- -threaded-programs/
- So there! credit where it's due. Koszonom szepen Laszlo!
-
 Stack tracer for multi-threaded applications.
 
+Periodically samples the stacks of all threads, and dumps them as plain text
+or JSON, only when they changed since the previous sample. Player threads
+that wait for permission are annotated with the checkpoint they wait on.
+
+Sampling only walks the frames, without reading source files, so leaving it
+on costs little.
+
+Credit where it's due: the original version was a recipe by Laszlo Nagy
+ http://code.activestate.com/recipes/577334-how-to-debug-deadlocked-multi
+ -threaded-programs/
 
 Usage:
 
 import stacktracer
-stacktracer.trace_start("trace.html",interval=5,auto=True) # Set auto flag
+stacktracer.trace_start("trace.txt",interval=5,auto=True) # Set auto flag
 to always update file!
 ....
 stacktracer.trace_stop()
+
+Setting the PYVALDI_TRACE environment variable to a path traces every
+process importing pyvaldi into that file.
 """
 
+import json
+import os
 import sys
-import traceback
-from pygments import highlight
-from pygments.lexers import PythonLexer
-from pygments.formatters import HtmlFormatter
+import threading
 
+# Functions which receive the checkpoint a thread is blocked on
+WAITING_FUNCTIONS = frozenset(['wait_for_permission', 'wait_acknowledgement'])
 
-# Taken from http://bzimmer.ziclix.com/2008/12/17/python-thread-dumps/
 
-def stacktraces():
-    code = []
-    for threadId, stack in sys._current_frames().items():
-        code.append("\n# ThreadID: %s" % threadId)
-        for filename, lineno, name, line in traceback.extract_stack(stack):
-            code.append(
-                'File: "%s", line %d, in %s' % (filename, lineno, name))
-            if line:
-                code.append("  %s" % (line.strip()))
+def sample_stacks():
+    """Return the stacks of all threads, outermost frame first.
 
-    return highlight("\n".join(code), PythonLexer(), HtmlFormatter(
-        full=False,
-        # style="native",
-        noclasses=True,
-    ))
+    :return: {thread id: (checkpoint, [(filename, lineno, function name)])},
+        where checkpoint is the one the thread waits on, or None
+    """
+    samples = {}
+    for thread_id, frame in sys._current_frames().items():
+        stack = []
+        checkpoint = None
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, frame.f_lineno, code.co_name))
+            if checkpoint is None and code.co_name in WAITING_FUNCTIONS:
+                checkpoint = frame.f_locals.get('checkpoint')
+            frame = frame.f_back
+        stack.reverse()
+        samples[thread_id] = (checkpoint, stack)
+    return samples
 
 
-# This part was made by nagylzs
-import os
-import time
-import threading
+def _thread_names():
+    return dict((thread.ident, thread.name) for thread in threading.enumerate())
+
+
+def format_text(samples):
+    names = _thread_names()
+    lines = []
+    for thread_id, (checkpoint, stack) in sorted(samples.items()):
+        lines.append("\n# ThreadID: %s (%s)" % (
+            thread_id, names.get(thread_id, 'unknown')))
+        if checkpoint is not None:
+            lines.append("# Waiting on: %s" % (checkpoint,))
+        for filename, lineno, name in stack:
+            lines.append('File: "%s", line %d, in %s' % (filename, lineno, name))
+    return "\n".join(lines)
+
+
+def format_json(samples):
+    names = _thread_names()
+    return json.dumps([{
+        'thread_id': thread_id,
+        'thread_name': names.get(thread_id),
+        'waiting_on': None if checkpoint is None else str(checkpoint),
+        'stack': stack,
+    } for thread_id, (checkpoint, stack) in sorted(samples.items())], indent=1)
+
+
+FORMATTERS = {'text': format_text, 'json': format_json}
 
 
 class TraceDumper(threading.Thread):
     """Dump stack traces into a given file periodically."""
 
-    def __init__(self, fpath, interval, auto):
+    def __init__(self, fpath, interval, auto, format='text'):
         """
-        @param fpath: File path to output HTML (stack trace file)
+        @param fpath: File path to output the stack traces to
         @param auto: Set flag (True) to update trace continuously.
             Clear flag (False) to update only if file not exists.
             (Then delete the file to force update.)
-        @param interval: In seconds: how often to update the trace file.
+        @param interval: In seconds: how often to sample the stacks.
+        @param format: 'text' or 'json'
         """
-        assert (interval > 0.1)
+        assert (interval > 0)
         self.auto = auto
         self.interval = interval
         self.fpath = os.path.abspath(fpath)
+        self.formatter = FORMATTERS[format]
         self.stop_requested = threading.Event()
+        self.last_samples = None
         threading.Thread.__init__(self)
 
     def run(self):
-        while not self.stop_requested.isSet():
-            time.sleep(self.interval)
+        while not self.stop_requested.wait(self.interval):
             if self.auto or not os.path.isfile(self.fpath):
                 self.stacktraces()
 
@@ -78,26 +116,37 @@ class TraceDumper(threading.Thread):
         try:
             if os.path.isfile(self.fpath):
                 os.unlink(self.fpath)
-        except:
+        except OSError:
             pass
 
     def stacktraces(self):
-        fout = file(self.fpath, "wb+")
-        try:
-            fout.write(stacktraces())
-        finally:
-            fout.close()
+        """Write the stacks to the file, unless they didn't change.
+
+        :return: whether the file was written
+        :rtype: bool
+        """
+        samples = sample_stacks()
+        # The sampling thread itself is always somewhere else
+        samples.pop(threading.current_thread().ident, None)
+        if (samples == self.last_samples and
+                os.path.isfile(self.fpath)):
+            return False
+        self.last_samples = samples
+
+        with open(self.fpath, "w") as fout:
+            fout.write(self.formatter(samples))
+        return True
 
 
 _tracer = None
 
 
-def trace_start(fpath, interval=5, auto=True):
+def trace_start(fpath, interval=5, auto=True, format='text'):
     """Start tracing into the given file."""
     global _tracer
     if _tracer is None:
-        _tracer = TraceDumper(fpath, interval, auto)
-        _tracer.setDaemon(True)
+        _tracer = TraceDumper(fpath, interval, auto, format)
+        _tracer.daemon = True
         _tracer.start()
     else:
         raise Exception("Already tracing to %s" % _tracer.fpath)
@@ -0,0 +1,214 @@
+"""Music sheets read lazily, one note at a time.
+
+A :class:`StreamingConductor` takes any iterable of checkpoints, including
+generators and the :func:`repeat` / :func:`cycle` combinators, and never
+materializes it: the players are only told their next checkpoint when the
+conductor gets to it. The same checkpoint objects may appear any number of
+times, so a loop synchronizing on every iteration needs one checkpoint per
+step of its body, not per iteration.
+
+As it isn't known which checkpoint is the last one of a player, the players
+only run to their end once the notes are exhausted.
+"""
+import itertools
+import sys
+import threading
+
+from pyvaldi.checkpoints import ImplicitCheckpoint, UnreachedCheckpoint
+from pyvaldi.profiler import C_RETURN_EVENTS
+
+
+def repeat(pattern, times):
+    """Return the notes of the pattern, repeated the given number of times
+
+    :param list[pyvaldi.checkpoints.Checkpoint] pattern:
+    :param int times:
+    """
+    return itertools.chain.from_iterable(itertools.repeat(pattern, times))
+
+
+def cycle(pattern):
+    """Return the notes of the pattern, repeated indefinitely
+
+    :param list[pyvaldi.checkpoints.Checkpoint] pattern:
+    """
+    return itertools.cycle(pattern)
+
+
+class Part(object):
+    """The part of a single player, handed to it one checkpoint at a time"""
+    def __init__(self, player):
+        self.player = player
+        self.target = None
+        self.granted = threading.Event()
+        self.arrived = threading.Event()
+        self.error = None  # what kept the player from reaching its notes
+
+
+class StreamingMusicSheet(object):
+    """Reads the notes lazily, adding the implicit checkpoints"""
+    def __init__(self, notes, players):
+        """
+        :param notes: an iterable of checkpoints, in the order they should
+            be reached
+        :param list[ProcessPlayer] players: all the players
+        """
+        self.notes = notes
+        self.players = players
+        self.parts = dict((player, Part(player)) for player in players)
+
+    def player_checkpoints(self, player):
+        return self.parts[player]
+
+    def __iter__(self):
+        started = set()
+        for note in self.notes:
+            if note.player not in started:
+                started.add(note.player)
+                yield note.player.get_initial_checkpoint()
+            yield note
+
+        for player in self.players:
+            if player not in started:
+                yield player.get_initial_checkpoint()
+            yield player.get_terminal_checkpoint()
+
+
+class StreamingProfiler(object):
+    """Stops the player at the checkpoint it was last granted"""
+    def __init__(self, baton, part):
+        self.baton = baton
+        self.part = part
+        self.target = None
+
+    def profile(self, frame, action_string, whatever):
+        target = self.target
+        if target.before:
+            reached = (
+                action_string == 'call' and target.is_reached(frame.f_code) and
+                target.is_reached_by(frame) or
+                action_string == 'c_call' and target.is_called(whatever))
+        else:
+            reached = (
+                action_string == 'return' and target.is_reached(frame.f_code) and
+                target.is_reached_by(frame) or
+                action_string in C_RETURN_EVENTS and target.is_called(whatever))
+        if reached:
+            self.baton.acknowledge_checkpoint(target)
+            self.target = self.baton.wait_for_permission(self.part)
+
+
+class StreamingThread(threading.Thread):
+    def __init__(self, group=None, target=None, name=None,
+                 args=(), kwargs=None):
+        super(StreamingThread, self).__init__(
+            group, target, name, args, kwargs)
+        self.baton = None
+        self.part = None
+        self.profiler = None
+        self.daemon = True
+
+    def tune(self, baton, part):
+        self.baton = baton
+        self.part = part
+        self.profiler = StreamingProfiler(baton, part)
+
+    def run(self):
+        initial_checkpoint = self.baton.wait_for_permission(self.part)
+        self.baton.acknowledge_checkpoint(initial_checkpoint)
+        self.profiler.target = self.baton.wait_for_permission(self.part)
+
+        sys.setprofile(self.profiler.profile)
+        try:
+            super(StreamingThread, self).run()
+        except Exception as error:
+            self.part.error = error
+        finally:
+            sys.setprofile(None)
+
+        # The terminal checkpoint is only granted once the notes are
+        # exhausted. Notes granted before that were never reached: they're
+        # acknowledged anyway, for the conductor to raise instead of waiting.
+        target = self.profiler.target
+        while not target.is_terminal():
+            if self.part.error is None:
+                self.part.error = UnreachedCheckpoint(target)
+            self.baton.acknowledge_checkpoint(target)
+            target = self.baton.wait_for_permission(self.part)
+        self.baton.acknowledge_checkpoint(target)
+
+
+class StreamingBaton(object):
+    """Hands the checkpoints to the parts of the players, one at a time"""
+    instrument_class = StreamingThread
+
+    def __init__(self, music_sheet):
+        """
+        :param StreamingMusicSheet music_sheet:
+        """
+        self.parts = music_sheet.parts
+
+    def wait_for_permission(self, part):
+        """Block until the player is granted its next checkpoint
+
+        :param Part part:
+        :return: the checkpoint the player may run up to
+        """
+        part.granted.wait()
+        part.granted.clear()
+        return part.target
+
+    def yield_permission(self, checkpoint):
+        part = self.parts[checkpoint.player]
+        part.target = checkpoint
+        part.arrived.clear()
+        part.granted.set()
+
+    def wait_acknowledgement(self, checkpoint):
+        self.parts[checkpoint.player].arrived.wait()
+
+    def acknowledge_checkpoint(self, checkpoint):
+        self.parts[checkpoint.player].arrived.set()
+
+
+class StreamingConductor(object):
+    """Runs the players, pausing them at the notes read from an iterable"""
+    def __init__(self, players, notes):
+        """
+        :param list[ProcessPlayer] players: a list of process players
+        :param notes: an iterable of checkpoints (notes), possibly endless
+        """
+        self.players = players
+        self.music_sheet = StreamingMusicSheet(notes, players)
+        self.order = iter(self.music_sheet)
+        self.baton = StreamingBaton(self.music_sheet)
+        self.failed = set()  # parts whose error was raised already
+
+        for player in players:
+            player.play(self.music_sheet.player_checkpoints(player), self.baton)
+
+    def next(self):
+        """Run until the next note is reached
+
+        :return: the note, or None once the notes are exhausted and the
+            players ended
+        """
+        for checkpoint in self.order:
+            self.baton.yield_permission(checkpoint)
+            self.baton.wait_acknowledgement(checkpoint)
+            self.raise_error(self.music_sheet.parts[checkpoint.player])
+            if not isinstance(checkpoint, ImplicitCheckpoint):
+                return checkpoint
+
+    def raise_error(self, part):
+        """Re-raise what kept a player from reaching its notes, such as
+        its callable raising or returning early, the first time it's noticed
+        """
+        if part.error is not None and part not in self.failed:
+            self.failed.add(part)
+            raise part.error
+
+    __next__ = next
+
+    def __iter__(self):
+        return self
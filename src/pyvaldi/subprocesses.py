@@ -0,0 +1,323 @@
+"""Players running external programs, in subprocesses.
+
+A :class:`SubprocessPlayer` launches a command and follows the lines it
+writes to its stdout and stderr. Its checkpoints are regular expressions,
+reached when the program writes a line matching them. The program is then
+paused until the conductor lets it go on, either:
+
+* by sending it SIGSTOP, then SIGCONT (POSIX only). Lines the program
+  manages to write before it's stopped are only looked at once it resumes.
+* by withholding the line it reads from its stdin after writing a
+  checkpoint line, for programs written to cooperate. Every line such a
+  program waits after must be a checkpoint of the music sheet.
+
+All the subprocess players share one :class:`OutputReader` thread, reading
+all their pipes through a selector. The same thread starts and resumes the
+programs when the conductor grants them permission, so the players don't
+wait on threads of their own. For this they need the default
+:class:`pyvaldi.Baton`, which notifies them of every permission it grants.
+
+A player whose handling raises, or whose program ends before reaching a
+checkpoint it was granted, is ended with that error. The conductor raises
+it, and goes on with the other players.
+"""
+import collections
+import os
+import re
+import selectors
+import signal
+import subprocess
+import threading
+
+from pyvaldi.checkpoints import (
+    ImplicitCheckpoint, OutputCheckpoint, UnreachedCheckpoint)
+
+SIGNAL = 'signal'
+STDIN = 'stdin'
+STREAMS = ('stdout', 'stderr')
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def get_reader():
+    """Return the reader shared by the subprocess players, starting it on
+    first use
+    """
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = OutputReader()
+        return _reader
+
+
+class OutputReader(object):
+    """Reads the output of any number of subprocess players, on one thread.
+
+    Everything touching the state of the players happens on this thread,
+    other threads hand it work through :meth:`call`.
+    """
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.commands = collections.deque()
+        self.wakeup_r, self.wakeup_w = os.pipe()
+        self.selector.register(self.wakeup_r, selectors.EVENT_READ)
+
+        self.thread = threading.Thread(
+            target=self.run, name='pyvaldi output reader')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def call(self, player, function, *args):
+        """Call the function on the reader thread, on behalf of the player"""
+        self.commands.append((player, function, args))
+        os.write(self.wakeup_w, b'\0')
+
+    def watch(self, fd, player, stream):
+        self.selector.register(fd, selectors.EVENT_READ, (player, stream))
+
+    def unwatch(self, fd):
+        self.selector.unregister(fd)
+
+    def run(self):
+        while True:
+            for key, _ in self.selector.select():
+                if key.data is None:
+                    os.read(self.wakeup_r, 512)
+                    while self.commands:
+                        player, function, args = self.commands.popleft()
+                        self.handle(player, function, *args)
+                    continue
+
+                player, stream = key.data
+                # A command run just before may have paused the player
+                if not player.paused and stream in player.fds:
+                    self.handle(player, player.feed, stream,
+                                os.read(key.fd, 65536))
+
+    def handle(self, player, function, *args):
+        """Call the function, ending the player if it raises, so that
+        neither the thread nor the other players die with it
+        """
+        try:
+            function(*args)
+        except Exception as error:
+            player.fail(error)
+
+
+class SubprocessPlayer(object):
+    """Runs a command in a subprocess, pausing it when it writes the lines
+    its checkpoints match
+    """
+    def __init__(self, args, name="nameless", pause=SIGNAL, reader=None,
+                 **popen_kwargs):
+        """
+        :param list[str] args: the command, as for :class:`subprocess.Popen`
+        :param str name: the name of this player
+        :param str pause: how to pause the program at a checkpoint,
+            :data:`SIGNAL` or :data:`STDIN`
+        :param OutputReader | None reader: the reader to use, the one
+            shared by all the players by default
+        :param popen_kwargs: other arguments for :class:`subprocess.Popen`
+        """
+        if pause not in (SIGNAL, STDIN):
+            raise ValueError("Unknown way to pause: {}".format(pause))
+        self.args = args
+        self.name = name
+        self.pause = pause
+        self.reader = reader
+        self.popen_kwargs = popen_kwargs
+        self.music_sheet = None
+        self.baton = None
+        self._terminal_checkpoint = ImplicitCheckpoint(self, None)
+        self._initial_checkpoint = ImplicitCheckpoint(self, None, before=True)
+
+        self.process = None
+        self.finished = False
+        self.returncode = None
+        self.error = None
+        self.unreached = None  # the checkpoint the program ended before
+        self.output = []  # list[(stream, line)], as looked at
+
+        # Only touched on the reader thread
+        self.position = 0  # of the checkpoint the program runs up to
+        self.permitted = 0  # how many checkpoints were granted
+        self.paused = False
+        self.watching = False
+        self.fds = {}
+        self.buffers = {}
+        self.pending = collections.deque()
+
+    def add_checkpoint(self, pattern, stream=None, name=None):
+        """Create and return a checkpoint, reached when the program writes
+        a line matching the pattern
+
+        :param str pattern: a regular expression, searched in every line
+        :param str | None stream: 'stdout' or 'stderr', or None for both
+        :param str | None name:
+        """
+        streams = STREAMS if stream is None else (stream,)
+        return OutputCheckpoint(
+            self, re.compile(pattern), streams,
+            name=pattern if name is None else name)
+
+    def get_terminal_checkpoint(self):
+        """Returns a checkpoint that marks the process end"""
+        return self._terminal_checkpoint
+
+    def get_initial_checkpoint(self):
+        """Return the initial checkpoint, that marks the process beginning"""
+        return self._initial_checkpoint
+
+    def play(self, player_checkpoints, baton):
+        self.music_sheet = player_checkpoints
+        self.baton = baton
+        if self.reader is None:
+            self.reader = get_reader()
+        baton.listen(self, self.notify)
+
+    def notify(self, checkpoint):
+        """Called by the baton, on the conductor's thread"""
+        self.reader.call(self, self.granted, checkpoint)
+
+    def granted(self, checkpoint):
+        self.permitted += 1
+        if checkpoint.is_initial() or self.finished:
+            # Nothing to run up to the initial checkpoint, nor once ended
+            self.arrive()
+        elif self.process is None:
+            self.start()
+        elif self.paused:
+            self.resume()
+        # otherwise it already runs, several checkpoints were granted at once
+
+    def start(self):
+        stdin = subprocess.PIPE if self.pause == STDIN else subprocess.DEVNULL
+        try:
+            self.process = subprocess.Popen(
+                self.args, stdin=stdin, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, **self.popen_kwargs)
+        except OSError as error:
+            self.error = error
+            self.end(None)
+            return
+
+        for stream in STREAMS:
+            self.fds[stream] = getattr(self.process, stream).fileno()
+            self.buffers[stream] = b''
+        self.watch(True)
+
+    def resume(self):
+        self.paused = False
+        if self.pause == SIGNAL:
+            self.process.send_signal(signal.SIGCONT)
+        else:
+            self.acknowledge_line()
+
+        while self.pending and not self.paused:
+            self.receive(*self.pending.popleft())
+        if self.paused:
+            return
+
+        self.watch(True)
+        if not self.fds:
+            self.end(self.process.wait())
+
+    def watch(self, watching):
+        """Start or stop reading the pipes"""
+        if watching == self.watching:
+            return
+        self.watching = watching
+        for stream, fd in self.fds.items():
+            if watching:
+                self.reader.watch(fd, self, stream)
+            else:
+                self.reader.unwatch(fd)
+
+    def acknowledge_line(self):
+        """Let a program waiting on its stdin go on"""
+        try:
+            self.process.stdin.write(b'\n')
+            self.process.stdin.flush()
+        except (IOError, OSError):
+            pass  # the program already ended
+
+    def stop(self):
+        if self.pause == SIGNAL:
+            self.process.send_signal(signal.SIGSTOP)
+        self.paused = True
+        self.watch(False)
+
+    def feed(self, stream, data):
+        """Handle what was read from one of the pipes"""
+        if not data:
+            self.reader.unwatch(self.fds.pop(stream))
+            getattr(self.process, stream).close()
+            tail = self.buffers.pop(stream)
+            if tail:
+                self.receive(stream, tail)
+            if not self.fds and not self.paused:
+                self.end(self.process.wait())
+            return
+
+        lines = (self.buffers[stream] + data).split(b'\n')
+        self.buffers[stream] = lines.pop()
+        for line in lines:
+            self.receive(stream, line)
+
+    def receive(self, stream, line):
+        if self.paused:
+            self.pending.append((stream, line))
+            return
+
+        line = line.decode('utf-8', 'replace').rstrip(u'\r')
+        self.output.append((stream, line))
+        target = self.music_sheet[self.position]
+        if isinstance(target, OutputCheckpoint) and target.matches(stream, line):
+            if self.position + 1 < self.permitted:
+                # The next checkpoint was granted along with this one
+                if self.pause == STDIN:
+                    self.acknowledge_line()
+            else:
+                self.stop()
+            self.arrive()
+
+    def arrive(self):
+        checkpoint = self.music_sheet[self.position]
+        self.position += 1
+        self.baton.acknowledge_checkpoint(checkpoint)
+
+    def end(self, returncode):
+        self.finished = True
+        self.returncode = returncode
+        if self.process is not None and self.process.stdin is not None:
+            self.process.stdin.close()
+        if not self.music_sheet[self.position].is_terminal():
+            # Let the conductor go on, instead of waiting forever
+            self.unreached = self.music_sheet[self.position]
+            if self.error is None:
+                self.error = UnreachedCheckpoint(self.unreached)
+        while self.position < self.permitted:
+            self.arrive()
+
+    def fail(self, error):
+        """End the player on an error, for the conductor to raise"""
+        if self.error is None:
+            self.error = error
+        if self.finished:
+            return
+        self.watch(False)
+        self.fds.clear()
+        self.pending.clear()
+        returncode = None
+        if self.process is not None:
+            self.process.kill()
+            returncode = self.process.wait()
+            for stream in STREAMS:
+                getattr(self.process, stream).close()
+        self.end(returncode)
+
+    def __repr__(self):
+        return u"<SubprocessPlayer {}>".format(self.name)
+
+    __str__ = __repr__
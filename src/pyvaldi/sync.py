@@ -4,35 +4,41 @@ import threading
 class CascadingEventGroup(object):
     """A collection of events, that can only be set in the order specified by
     the token list
+
+    The order is checked against the events themselves, instead of a shared
+    index guarded by a lock, so setting an event takes no other lock than its
+    own. The check and the setting aren't atomic though: each token must be
+    done with by a single thread, as the :class:`pyvaldi.Baton` does (the
+    conductor grants, the player of the checkpoint acknowledges). Only the
+    order followed by such writers is checked.
     """
     def __init__(self, tokens, name=None):
         self.tokens = tokens
         self.name = name
 
-        self.token_idx = 0
         self.events = [(token, threading.Event()) for token in tokens]
         self.event_dict = dict(self.events)
-        self.release_lock = threading.Lock()
+        self.positions = dict(
+            (token, position) for position, token in enumerate(tokens))
 
     def wait_on(self, token):
         self.event_dict[token].wait()
 
     def done_with(self, token):
-        # protection for when incrementing and setting the events
-        self.release_lock.acquire()
+        position = self.positions.get(token)
         # protection against wrong token releasing the lock
-        if token is not self.events[self.token_idx][0]:
-            self.release_lock.release()
+        if (position is None or self.events[position][1].is_set() or
+                position and not self.events[position - 1][1].is_set()):
             raise threading.ThreadError(
                 "At this time, releasing the lock can only be done with "
-                "token {}".format(str(self.events[self.token_idx][0])))
-        if self.token_idx + 1 > len(self.events):
-            self.release_lock.release()
-            return
+                "token {}".format(str(self.next_token())))
+        self.events[position][1].set()
 
-        self.token_idx += 1
-        self.events[self.token_idx - 1][1].set()
-        self.release_lock.release()
+    def next_token(self):
+        """Return the token whose event should be set next, or None"""
+        for token, event in self.events:
+            if not event.is_set():
+                return token
 
     def __repr__(self):
-        return u"<CEG {}>".format(self.name if self.name else '')
\ No newline at end of file
+        return u"<CEG {}>".format(self.name if self.name else '')
@@ -4,16 +4,15 @@ from pyvaldi.profiler import RhythmProfiler
 from pyvaldi.checkpoints import ImplicitCheckpoint
 
 
-class InstrumentedThread(threading.Thread):
-    def __init__(self, group=None, target=None, name=None,
-             args=(), kwargs=None, verbose=None):
-        super(InstrumentedThread, self).__init__(
-            group, target, name, args, kwargs, verbose)
-        self.profiler = RhythmProfiler()
-        self.baton = None
-        self.initial_checkpoint = None
-        self.terminal_checkpoint = None
-        self.setDaemon(True)
+class Instrument(object):
+    """Plays the callable of a player, stopping at its checkpoints.
+
+    Subclasses decide what the callable is played on.
+    """
+    profiler = None
+    baton = None
+    initial_checkpoint = None
+    terminal_checkpoint = None
 
     def tune(self, baton, checkpoints):
         self.profiler.baton = baton
@@ -21,8 +20,11 @@ class InstrumentedThread(threading.Thread):
         # the thread - the implicit ones
         self.initial_checkpoint = checkpoints[0]
         self.terminal_checkpoint = checkpoints[-1]
+        # ...the terminal one is kept last, so that after the last regular
+        # checkpoint the player waits for permission to run until the end
         self.profiler.checkpoints = [
-            cp for cp in checkpoints if not isinstance(cp, ImplicitCheckpoint)]
+            cp for cp in checkpoints if not isinstance(cp, ImplicitCheckpoint)
+        ] + [self.terminal_checkpoint]
         self.baton = baton
 
     def run(self):
@@ -31,9 +33,25 @@ class InstrumentedThread(threading.Thread):
         # Check the initial checkpoint. Decide the order in which players start
         self.baton.wait_for_permission(self.initial_checkpoint)
         self.baton.acknowledge_checkpoint(self.initial_checkpoint)
+        self.baton.wait_for_permission(self.profiler.checkpoints[0])
 
-        super(InstrumentedThread, self).run()
+        self.play_target()
 
         # Allows a player to finish, before allowing new one to start.
         self.baton.wait_for_permission(self.terminal_checkpoint)
-        self.baton.acknowledge_checkpoint(self.terminal_checkpoint)
\ No newline at end of file
+        self.baton.acknowledge_checkpoint(self.terminal_checkpoint)
+
+    def play_target(self):
+        raise NotImplementedError
+
+
+class InstrumentedThread(Instrument, threading.Thread):
+    def __init__(self, group=None, target=None, name=None,
+             args=(), kwargs=None, verbose=None):
+        super(InstrumentedThread, self).__init__(
+            group, target, name, args, kwargs)
+        self.profiler = RhythmProfiler()
+        self.setDaemon(True)
+
+    def play_target(self):
+        threading.Thread.run(self)
@@ -1,3 +1,9 @@
+import threading
+
+from pyvaldi import ProcessPlayer
+from pyvaldi.explorer import Scenario
+
+
 class ThreePhaseMachine(object):
     def __init__(self):
         self.steps = []
@@ -19,3 +25,128 @@ class ThreePhaseMachine(object):
 
     def __repr__(self):
         return u'<Machine: {}>'.format(self.steps)
+
+
+class JournalingMachine(ThreePhaseMachine):
+    """Records its phases in a journal, that can be shared by machines"""
+    def __init__(self, name, journal):
+        super(JournalingMachine, self).__init__()
+        self.name = name
+        self.journal = journal
+
+    def first_phase(self):
+        self.journal.append((self.name, 1))
+
+    def second_phase(self):
+        self.journal.append((self.name, 2))
+
+    def third_phase(self):
+        self.journal.append((self.name, 3))
+
+
+class Account(object):
+    def __init__(self):
+        self.balance = 0
+
+
+class Depositor(object):
+    """Deposits 1, reading and writing the balance in separate steps"""
+    def __init__(self, account):
+        self.account = account
+        self.seen = None
+
+    def read(self):
+        self.seen = self.account.balance
+
+    def write(self):
+        self.account.balance = self.seen + 1
+
+    def __call__(self):
+        self.read()
+        self.write()
+
+
+class LostUpdateScenario(Scenario):
+    def __init__(self, memoize):
+        self.memoize = memoize
+
+    def setup(self):
+        self.account = Account()
+        self.depositors = [Depositor(self.account), Depositor(self.account)]
+
+        players = []
+        checkpoints = []
+        for idx, depositor in enumerate(self.depositors):
+            player = ProcessPlayer(depositor, 'd{}'.format(idx))
+            players.append(player)
+            checkpoints.append(player.add_checkpoint_after(depositor.read))
+            checkpoints.append(player.add_checkpoint_after(depositor.write))
+        return players, checkpoints
+
+    def fingerprint(self):
+        if self.memoize:
+            return (self.account.balance,) + tuple(
+                depositor.seen for depositor in self.depositors)
+
+    def check(self):
+        assert self.account.balance == 2, self.account.balance
+
+
+class Signaller(object):
+    """Sets an event between two phases of its own"""
+    def __init__(self, event):
+        self.event = event
+        self.finished = False
+
+    def prepare(self):
+        pass
+
+    def signal(self):
+        self.event.set()
+
+    def finish(self):
+        self.finished = True
+
+    def __call__(self):
+        self.prepare()
+        self.signal()
+        self.finish()
+
+
+class Waiter(object):
+    """Reacts once the event is set, noting whether the signaller finished"""
+    def __init__(self, event, signaller):
+        self.event = event
+        self.signaller = signaller
+        self.early = None
+
+    def react(self):
+        self.early = not self.signaller.finished
+
+    def __call__(self):
+        self.event.wait()
+        self.react()
+
+
+class EarlyReactionScenario(Scenario):
+    """Fails when the waiter reacts before the signaller finished. Holding
+    the signaller before it signals while granting the waiter its
+    checkpoint leaves the waiter waiting forever.
+    """
+    def setup(self):
+        event = threading.Event()
+        self.signaller = Signaller(event)
+        self.waiter = Waiter(event, self.signaller)
+
+        signaller = ProcessPlayer(self.signaller, 'signaller')
+        waiter = ProcessPlayer(self.waiter, 'waiter')
+        checkpoints = [
+            signaller.add_checkpoint_after(self.signaller.prepare),
+            signaller.add_checkpoint_after(self.signaller.signal),
+            signaller.add_checkpoint_after(self.signaller.finish),
+            waiter.add_checkpoint_after(self.waiter.react),
+        ]
+        return [signaller, waiter], checkpoints
+
+    def check(self):
+        assert not self.waiter.early
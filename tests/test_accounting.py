@@ -0,0 +1,53 @@
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+
+from .artefacts import JournalingMachine, ThreePhaseMachine
+
+
+class OverheadAccountingTestCase(unittest.TestCase):
+    def test_overhead_is_accounted_per_player_and_checkpoint(self):
+        journal = []
+        machine1 = JournalingMachine('m1', journal)
+        machine2 = JournalingMachine('m2', journal)
+        p1 = ProcessPlayer(machine1, 'p1')
+        p2 = ProcessPlayer(machine2, 'p2')
+        cp1 = p1.add_checkpoint_after(machine1.first_phase)
+        cp2 = p2.add_checkpoint_after(machine2.second_phase)
+
+        conductor = ProcessConductor([p1, p2], [cp1, cp2], accounting=True)
+        while conductor.next() is not None:
+            pass
+        overhead = conductor.get_overhead()
+
+        self.assertEqual(set(overhead.players), set([p1, p2]))
+        for ledger in overhead.players.values():
+            self.assertGreater(ledger.events, 0)
+            self.assertGreater(ledger.profile_time, 0)
+            self.assertGreater(ledger.handoffs, 0)
+        self.assertEqual(overhead.conductor.events, 0)
+        self.assertIn(cp1, overhead.permission_waits)
+        self.assertIn(cp2, overhead.acknowledgement_waits)
+        self.assertIn(p1.get_terminal_checkpoint(),
+                      overhead.acknowledgement_waits)
+        self.assertEqual(
+            overhead.events,
+            sum(ledger.events for ledger in overhead.players.values()))
+        self.assertIn('p1', overhead.report())
+
+    def test_no_overhead_without_accounting(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.first_phase)
+
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertIsNone(conductor.get_overhead())
+
+    def test_accounting_requires_threads_in_a_total_order(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.first_phase)
+
+        with self.assertRaises(ValueError):
+            ProcessConductor([player], [cp], constraints=[], accounting=True)
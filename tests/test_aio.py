@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+
+from .artefacts import JournalingMachine, ThreePhaseMachine
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=5))
+
+
+class AsyncConductorTestCase(unittest.TestCase):
+    def test_thread_state_changes_after_each_awaited_checkpoint(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_before(machine.first_phase)
+        cp2 = player.add_checkpoint_after(machine.second_phase)
+        conductor = ProcessConductor([player], [cp1, cp2])
+
+        async def conduct():
+            self.assertIs(await conductor.next_async(), cp1)
+            self.assertEqual(machine.steps, [])
+            self.assertIs(await conductor.next_async(), cp2)
+            self.assertEqual(machine.steps, [1, 2])
+            self.assertIsNone(await conductor.next_async())
+            self.assertEqual(machine.steps, [1, 2, 3])
+
+        run(conduct())
+
+    def test_async_iteration_follows_the_music_sheet(self):
+        journal = []
+        machine1 = JournalingMachine('m1', journal)
+        machine2 = JournalingMachine('m2', journal)
+        p1 = ProcessPlayer(machine1, 'p1')
+        p2 = ProcessPlayer(machine2, 'p2')
+        cp1 = p1.add_checkpoint_after(machine1.first_phase)
+        cp2 = p2.add_checkpoint_after(machine2.first_phase)
+        cp3 = p1.add_checkpoint_after(machine1.second_phase)
+        conductor = ProcessConductor([p1, p2], [cp1, cp2, cp3])
+
+        async def conduct():
+            return [checkpoint async for checkpoint in conductor]
+
+        self.assertEqual(run(conduct()), [cp1, cp2, cp3])
+        self.assertEqual(len(journal), 6)
+
+    def test_event_loop_runs_while_players_play(self):
+        service_ready = threading.Event()
+
+        def client():
+            # Only returns once a coroutine of the loop answered
+            service_ready.wait()
+
+        player = ProcessPlayer(client)
+        cp = player.add_checkpoint_after(client)
+        conductor = ProcessConductor([player], [cp])
+
+        async def service():
+            await asyncio.sleep(0.05)
+            service_ready.set()
+
+        async def conduct():
+            reached, _ = await asyncio.gather(conductor.next_async(),
+                                              service())
+            return reached
+
+        self.assertIs(run(conduct()), cp)
+
+    def test_partial_orders_are_rejected(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.first_phase)
+        conductor = ProcessConductor([player], [cp], constraints=[])
+
+        with self.assertRaises(ValueError):
+            run(conductor.next_async())
@@ -0,0 +1,147 @@
+import datetime
+import socket
+import sqlite3
+import time
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.checkpoints import CFunctionCheckpoint, c_function_key
+from pyvaldi.interleaving import InterleavingConductor
+from pyvaldi.streaming import StreamingConductor
+
+
+class Inserter(object):
+    """Inserts into a table shared with other inserters"""
+    def __init__(self, connection, value):
+        self.cursor = connection.cursor()
+        self.value = value
+
+    def __call__(self):
+        self.cursor.execute('INSERT INTO t VALUES (?)', (self.value,))
+        self.cursor.execute('INSERT INTO t VALUES (?)', (self.value * 10,))
+
+
+class CFunctionCheckpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(
+            ':memory:', check_same_thread=False, isolation_level=None)
+        self.connection.execute('CREATE TABLE t (value INTEGER)')
+
+    def tearDown(self):
+        self.connection.close()
+
+    def values(self):
+        return [value for value, in
+                self.connection.execute('SELECT value FROM t ORDER BY rowid')]
+
+    def test_checkpoints_on_c_methods_pause_the_players(self):
+        inserter1 = Inserter(self.connection, 1)
+        inserter2 = Inserter(self.connection, 2)
+        p1 = ProcessPlayer(inserter1, 'p1')
+        p2 = ProcessPlayer(inserter2, 'p2')
+        cp1 = p1.add_checkpoint_after(sqlite3.Cursor.execute)
+        cp2 = p2.add_checkpoint_after(inserter2.cursor.execute)
+
+        conductor = ProcessConductor([p1, p2], [cp1, cp2])
+
+        self.assertIsInstance(cp1, CFunctionCheckpoint)
+        self.assertIs(next(conductor), cp1)
+        self.assertEqual(self.values(), [1])
+        # p1 ends right after its last checkpoint, before p2 starts
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(self.values(), [1, 10, 2])
+        self.assertIsNone(next(conductor))
+        self.assertEqual(self.values(), [1, 10, 2, 20])
+
+    def test_checkpoint_before_a_socket_send(self):
+        sender, receiver = socket.socketpair()
+        self.addCleanup(sender.close)
+        self.addCleanup(receiver.close)
+        receiver.setblocking(False)
+
+        player = ProcessPlayer(sender.sendall, 'sender', b'ping')
+        before = player.add_checkpoint_before(socket.socket.sendall)
+        after = player.add_checkpoint_after(socket.socket.sendall)
+
+        conductor = ProcessConductor([player], [before, after])
+
+        self.assertIs(next(conductor), before)
+        self.assertRaises(socket.error, receiver.recv, 4)
+        self.assertIs(next(conductor), after)
+        self.assertEqual(receiver.recv(4), b'ping')
+        self.assertIsNone(next(conductor))
+
+    def test_c_functions_raising_are_reached(self):
+        def query():
+            try:
+                self.connection.execute('SELECT missing FROM t')
+            except sqlite3.OperationalError:
+                pass
+
+        player = ProcessPlayer(query)
+        cp = player.add_checkpoint_after(sqlite3.Connection.execute)
+
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertIsNone(next(conductor))
+
+    def test_streamed_checkpoints_on_builtin_functions(self):
+        player = ProcessPlayer(lambda: [time.sleep(0) for _ in range(3)])
+        cp = player.add_checkpoint_before(time.sleep)
+
+        conductor = StreamingConductor([player], [cp] * 3)
+
+        self.assertEqual(list(iter(conductor.next, None)), [cp] * 3)
+
+    def test_interleaving_pauses_at_c_checkpoints(self):
+        inserter = Inserter(self.connection, 1)
+        player = ProcessPlayer(inserter)
+        cp = player.add_checkpoint_before(sqlite3.Cursor.execute)
+
+        conductor = InterleavingConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(self.values(), [])
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(self.values(), [1])
+        self.assertIsNone(next(conductor))
+
+
+class CFunctionKeyTestCase(unittest.TestCase):
+    def test_bound_methods_are_identified_by_their_descriptor(self):
+        first, second = socket.socketpair()
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+
+        self.assertIs(c_function_key(first.sendall),
+                      c_function_key(second.sendall))
+        self.assertIs(c_function_key(first.sendall),
+                      c_function_key(socket.socket.sendall))
+        self.assertIsNot(c_function_key(first.sendall),
+                         c_function_key(first.send))
+
+    def test_class_methods_are_identified_by_their_descriptor(self):
+        class Now(datetime.datetime):
+            pass
+
+        self.assertIsNot(datetime.datetime.now, datetime.datetime.now)
+        self.assertIs(c_function_key(datetime.datetime.now),
+                      c_function_key(datetime.datetime.now))
+        self.assertIs(c_function_key(Now.now),
+                      c_function_key(datetime.datetime.now))
+        self.assertIsNot(c_function_key(datetime.datetime.now),
+                         c_function_key(datetime.datetime.utcnow))
+
+    def test_class_method_checkpoint_is_reached(self):
+        player = ProcessPlayer(datetime.datetime.now)
+        cp = player.add_checkpoint_before(datetime.datetime.now)
+
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertIsNone(next(conductor))
+        self.assertIsInstance(cp, CFunctionCheckpoint)
+
+    def test_builtin_functions_are_their_own_key(self):
+        self.assertIs(c_function_key(time.sleep), time.sleep)
@@ -0,0 +1,121 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.captures import CaptureSkipped
+
+from .artefacts import ThreePhaseMachine
+
+
+class CapturesTestCase(unittest.TestCase):
+    def test_captures_see_the_state_of_the_pause(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_after(machine.first_phase)
+        cp2 = player.add_checkpoint_after(machine.second_phase)
+        cp2.add_capture('last', lambda checkpoint: machine.steps[-1])
+
+        conductor = ProcessConductor(
+            [player], [cp1, cp2],
+            captures={'steps': lambda checkpoint: list(machine.steps)})
+
+        self.assertIs(next(conductor), cp1)
+        self.assertEqual(cp1.snapshot['steps'], [1])
+        self.assertNotIn('last', cp1.snapshot)
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(cp2.snapshot['steps'], [1, 2])
+        self.assertEqual(cp2.snapshot['last'], 2)
+        self.assertIsNone(next(conductor))
+
+    def test_prefetched_captures_run_concurrently(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.first_phase)
+        captures = dict(
+            (name, lambda checkpoint, name=name: time.sleep(0.2) or name)
+            for name in ('db', 'cache', 'queue'))
+
+        conductor = ProcessConductor(
+            [player], [cp], captures=captures, capture_workers=3)
+
+        start = time.time()
+        self.assertIs(next(conductor), cp)
+        cp.snapshot.prefetch()
+        self.assertEqual(set(cp.snapshot), set(['db', 'cache', 'queue']))
+        for name in captures:
+            self.assertEqual(cp.snapshot[name], name)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertIsNone(next(conductor))
+
+    def test_captures_not_asked_for_are_skipped(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.first_phase)
+        started = threading.Event()
+        calls = []
+
+        def slow(checkpoint):
+            started.set()
+            time.sleep(0.1)
+            calls.append('slow')
+            return machine.steps[:]
+
+        def unused(checkpoint):
+            calls.append('unused')
+
+        cp.add_capture('slow', slow)
+        cp.add_capture('unused', unused)
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        cp.snapshot.prefetch('slow')
+        started.wait()
+        self.assertIsNone(next(conductor))
+
+        # The running capture held the players at the pause
+        self.assertEqual(cp.snapshot['slow'], [1])
+        self.assertRaises(CaptureSkipped, lambda: cp.snapshot['unused'])
+        self.assertEqual(calls, ['slow'])
+        self.assertEqual(machine.steps, [1, 2, 3])
+
+    def test_captures_are_awaited_without_blocking_the_loop(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.first_phase)
+        cp.add_capture('slow', lambda checkpoint: time.sleep(0.3))
+        conductor = ProcessConductor([player], [cp])
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(time.time())
+                await asyncio.sleep(0.01)
+
+        async def conduct():
+            self.assertIs(await conductor.next_async(), cp)
+            cp.snapshot.prefetch()
+            ticker = asyncio.ensure_future(tick())
+            self.assertIsNone(await conductor.next_async())
+            ticker.cancel()
+
+        asyncio.run(asyncio.wait_for(conduct(), timeout=5))
+        self.assertGreater(len(ticks), 5)
+
+    def test_captures_need_a_total_order(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.first_phase)
+
+        self.assertRaises(
+            ValueError, ProcessConductor, [player], [cp], constraints=[],
+            captures={'steps': lambda checkpoint: machine.steps})
+
+    def test_thread_pool_is_only_imported_once_used(self):
+        script = ('import sys, pyvaldi\n'
+                  'print("concurrent.futures" in sys.modules)\n')
+        output = subprocess.check_output([sys.executable, '-c', script])
+        self.assertEqual(output.strip(), b'False')
@@ -160,3 +160,37 @@ class BatonCheckpointOrderTestCase(unittest.TestCase):
             [p1] * 1 + [p2] * 1 + [p3] * 1 + [p4] * 1 +
             [p1] * 2 + [p2] * 2 + [p3] * 2 + [p4] * 2
         )
+
+
+class GrantsTestCase(unittest.TestCase):
+    def test_initial_checkpoints_are_granted_with_the_first_note(self):
+        p1 = ProcessPlayer(None, name='p1')
+        p2 = ProcessPlayer(None, name='p2')
+        cps = [Checkpoint(p1, 0), Checkpoint(p2, 0), Checkpoint(p1, 0)]
+        sheet = MusicSheet(cps)
+
+        grants = sheet.grants(cps)
+
+        assert grants == [
+            [p1.get_initial_checkpoint(), cps[0]],
+            [p2.get_initial_checkpoint(), cps[1]],
+            [p2.get_terminal_checkpoint()],
+            [cps[2]],
+            [p1.get_terminal_checkpoint()],
+        ]
+
+    def test_runs_of_a_player_are_granted_up_to_the_pauses(self):
+        p1 = ProcessPlayer(None, name='p1')
+        p2 = ProcessPlayer(None, name='p2')
+        cps = [Checkpoint(p1, 0), Checkpoint(p1, 0), Checkpoint(p1, 0),
+               Checkpoint(p2, 0)]
+        sheet = MusicSheet(cps)
+
+        grants = sheet.grants([cps[1], cps[3]])
+
+        assert grants == [
+            [p1.get_initial_checkpoint(), cps[0], cps[1]],
+            [cps[2], p1.get_terminal_checkpoint()],
+            [p2.get_initial_checkpoint(), cps[3]],
+            [p2.get_terminal_checkpoint()],
+        ]
@@ -0,0 +1,110 @@
+import sys
+import threading
+import unittest
+
+from pyvaldi import ProcessPlayer, ProcessConductor
+from pyvaldi.checkpoints import UnreachedCheckpoint
+from pyvaldi.cooperative import greenlet
+
+from .artefacts import ThreePhaseMachine, JournalingMachine
+
+
+@unittest.skipIf(greenlet is None, "greenlet is not installed")
+class CooperativeConductorTestCase(unittest.TestCase):
+    def test_thread_state_changes_after_each_checkpoint(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+
+        cp1 = player.add_checkpoint_before(machine.first_phase)
+        cp2 = player.add_checkpoint_before(machine.second_phase)
+        cp3 = player.add_checkpoint_after(machine.third_phase)
+
+        conductor = ProcessConductor(
+            [player], [cp1, cp2, cp3], cooperative=True)
+
+        self.assertIs(next(conductor), cp1)
+        self.assertEqual(machine.steps, [])
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(machine.steps, [1])
+        self.assertIs(next(conductor), cp3)
+        self.assertEqual(machine.steps, [1, 2, 3])
+        self.assertIsNone(next(conductor))
+
+    def test_players_are_interleaved_in_order(self):
+        journal = []
+        machine1 = JournalingMachine('m1', journal)
+        machine2 = JournalingMachine('m2', journal)
+        p1 = ProcessPlayer(machine1, 'p1')
+        p2 = ProcessPlayer(machine2, 'p2')
+
+        cp1_1 = p1.add_checkpoint_after(machine1.first_phase)
+        cp1_2 = p1.add_checkpoint_after(machine1.third_phase)
+        cp2_1 = p2.add_checkpoint_after(machine2.second_phase)
+
+        conductor = ProcessConductor(
+            [p1, p2], [cp1_1, cp2_1, cp1_2], cooperative=True)
+
+        self.assertEqual(list(iter(conductor.next, None)),
+                         [cp1_1, cp2_1, cp1_2])
+        # The sheet lets p2 finish right after its last checkpoint
+        self.assertEqual(journal, [
+            ('m1', 1), ('m2', 1), ('m2', 2), ('m2', 3), ('m1', 2),
+            ('m1', 3)])
+
+    def test_players_run_on_the_conductor_thread(self):
+        threads = []
+        record = lambda: threads.append(threading.current_thread())
+
+        player = ProcessPlayer(record)
+        cp = player.add_checkpoint_after(record)
+        conductor = ProcessConductor([player], [cp], cooperative=True)
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(threads, [threading.current_thread()])
+
+    def test_player_exceptions_reach_the_conductor(self):
+        def fail():
+            raise KeyError('player')
+
+        player = ProcessPlayer(fail)
+        cp = player.add_checkpoint_before(fail)
+        conductor = ProcessConductor([player], [cp], cooperative=True)
+
+        next(conductor)
+        with self.assertRaises(KeyError):
+            next(conductor)
+
+    def test_profiler_is_removed_when_a_player_raises(self):
+        def fail():
+            raise KeyError('player')
+
+        player = ProcessPlayer(fail)
+        cp = player.add_checkpoint_before(fail)
+        conductor = ProcessConductor([player], [cp], cooperative=True)
+
+        next(conductor)
+        with self.assertRaises(KeyError):
+            next(conductor)
+        self.assertIsNone(sys.getprofile())
+
+    def test_player_ending_early_is_raised(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_after(machine.first_phase)
+        cp2 = player.add_checkpoint_after(repr)
+        conductor = ProcessConductor([player], [cp1, cp2], cooperative=True)
+
+        self.assertIs(next(conductor), cp1)
+        with self.assertRaises(UnreachedCheckpoint) as raised:
+            next(conductor)
+        self.assertIs(raised.exception.checkpoint, cp2)
+        self.assertIsNone(next(conductor))
+        self.assertEqual(machine.steps, [1, 2, 3])
+
+    def test_constraints_are_rejected(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_before(machine.first_phase)
+
+        with self.assertRaises(ValueError):
+            ProcessConductor([player], [cp], constraints=[], cooperative=True)
@@ -0,0 +1,84 @@
+import io
+import threading
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.debuglog import DebugLog
+
+from .artefacts import ThreePhaseMachine
+
+
+class DebugLogTestCase(unittest.TestCase):
+    def test_synchronization_is_logged_at_the_end_of_the_run(self):
+        stream = io.StringIO()
+        debug_log = DebugLog(stream)
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine, 'p')
+        cp = player.add_checkpoint_after(machine.first_phase)
+
+        conductor = ProcessConductor([player], [cp], debug_log=debug_log)
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(stream.getvalue(), u'')
+        self.assertIsNone(next(conductor))
+
+        entries = debug_log.entries()
+        self.assertEqual(
+            [entry[0] for entry in entries],
+            sorted(entry[0] for entry in entries))
+        conducted = [(event, checkpoint) for _, name, event, checkpoint
+                     in entries if name == threading.current_thread().name]
+        # The initial checkpoint is granted along with the first one
+        self.assertEqual(conducted, [
+            ('grants', player.get_initial_checkpoint()),
+            ('grants', cp),
+            ('waits for acknowledgement', cp),
+            ('grants', player.get_terminal_checkpoint()),
+            ('waits for acknowledgement', player.get_terminal_checkpoint())])
+        self.assertIn((player.instrument.name, 'acknowledges', cp),
+                      [entry[1:] for entry in entries])
+        self.assertEqual(len(stream.getvalue().splitlines()), len(entries))
+
+    def test_log_is_flushed_on_failure(self):
+        stream = io.StringIO()
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine, 'p')
+        cp = player.add_checkpoint_after(machine.first_phase)
+
+        with self.assertRaises(AssertionError):
+            with DebugLog(stream) as debug_log:
+                conductor = ProcessConductor(
+                    [player], [cp], debug_log=debug_log)
+                next(conductor)
+                assert machine.steps == [], machine.steps
+
+        lines = stream.getvalue().splitlines()
+        # The player may have recorded more since
+        self.assertLessEqual(len(lines), len(debug_log.entries()))
+        self.assertIn('acknowledges', stream.getvalue())
+
+        # Flushing again only writes what was recorded since
+        next(conductor)
+        self.assertEqual(stream.getvalue().splitlines()[:len(lines)], lines)
+        self.assertEqual(len(stream.getvalue().splitlines()),
+                         len(debug_log.entries()))
+
+    def test_threads_write_to_buffers_of_their_own(self):
+        debug_log = DebugLog()
+
+        def record(name):
+            for idx in range(100):
+                debug_log.record(name, idx)
+
+        threads = [threading.Thread(target=record, args=(str(idx),))
+                   for idx in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(debug_log.buffers), 4)
+        entries = debug_log.entries()
+        self.assertEqual(len(entries), 400)
+        self.assertEqual([entry[0] for entry in entries],
+                         sorted(entry[0] for entry in entries))
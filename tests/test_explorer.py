@@ -0,0 +1,52 @@
+import unittest
+
+from pyvaldi.explorer import Explorer, LRUSet, complete_schedule
+
+from .artefacts import LostUpdateScenario
+
+
+class ExplorerTestCase(unittest.TestCase):
+    def test_every_order_is_run_without_fingerprints(self):
+        explorer = Explorer(LostUpdateScenario(memoize=False))
+
+        failures = explorer.explore()
+
+        self.assertEqual(explorer.runs, 6)
+        self.assertEqual(explorer.pruned, 0)
+        self.assertEqual(sorted(schedule for schedule, _ in failures), [
+            (0, 1, 0, 1), (0, 1, 1, 0), (1, 0, 0, 1), (1, 0, 1, 0)])
+
+    def test_orders_after_a_known_state_are_pruned(self):
+        explorer = Explorer(LostUpdateScenario(memoize=True))
+
+        failures = explorer.explore()
+
+        # Both reads in either order lead to the same state
+        self.assertEqual(explorer.runs, 5)
+        self.assertEqual(explorer.pruned, 1)
+        self.assertIn((0, 1, 0, 1), [schedule for schedule, _ in failures])
+
+    def test_exploration_stops_after_max_runs(self):
+        explorer = Explorer(LostUpdateScenario(memoize=False))
+
+        explorer.explore(max_runs=2)
+
+        self.assertEqual(explorer.runs, 2)
+
+    def test_schedule_is_completed_in_player_order(self):
+        self.assertEqual(complete_schedule((1,), [2, 2]), (1, 0, 0, 1))
+
+
+class LRUSetTestCase(unittest.TestCase):
+    def test_least_recently_used_item_is_evicted(self):
+        visited = LRUSet(2)
+        visited.add('a')
+        visited.add('b')
+        self.assertIn('a', visited)
+
+        visited.add('c')
+
+        self.assertIn('a', visited)
+        self.assertNotIn('b', visited)
+        self.assertIn('c', visited)
+        self.assertEqual(len(visited), 2)
@@ -0,0 +1,141 @@
+import threading
+import unittest
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+from pyvaldi import ProcessPlayer
+from pyvaldi.checkpoints import SynchronizationCheckpoint
+from pyvaldi.interleaving import (InterleavingConductor, RandomChooser,
+                                  ReplayChooser)
+
+from .artefacts import JournalingMachine, ThreePhaseMachine
+
+
+class Counter(object):
+    """Increments in 2 critical sections, so increments can get lost"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def increment(self):
+        with self.lock:
+            value = self.value
+        with self.lock:
+            self.value = value + 1
+
+
+class InterleavingConductorTestCase(unittest.TestCase):
+    def test_players_pause_after_releasing_locks(self):
+        counter = Counter()
+        player = ProcessPlayer(counter.increment, 'p')
+
+        conductor = InterleavingConductor([player])
+        first = next(conductor)
+        self.assertIsInstance(first, SynchronizationCheckpoint)
+        self.assertIs(first.primitive, counter.lock)
+        self.assertEqual(first.name, 'lock.__exit__')
+        self.assertFalse(first.before)
+        self.assertEqual(counter.value, 0)
+
+        self.assertIsInstance(next(conductor), SynchronizationCheckpoint)
+        self.assertEqual(counter.value, 1)
+        self.assertIsNone(next(conductor))
+
+    def test_serial_schedule_increments_twice(self):
+        counter = Counter()
+        p0 = ProcessPlayer(counter.increment, 'p0')
+        p1 = ProcessPlayer(counter.increment, 'p1')
+
+        conductor = InterleavingConductor(
+            [p0, p1], chooser=ReplayChooser([0, 0, 0, 1, 1, 1]))
+
+        self.assertEqual(conductor.finish(), [0, 0, 0, 1, 1, 1])
+        self.assertEqual(counter.value, 2)
+
+    def test_interleaved_schedule_loses_an_increment(self):
+        counter = Counter()
+        p0 = ProcessPlayer(counter.increment, 'p0')
+        p1 = ProcessPlayer(counter.increment, 'p1')
+
+        conductor = InterleavingConductor(
+            [p0, p1], chooser=ReplayChooser([0, 1, 0, 1, 0, 1]))
+
+        self.assertEqual(conductor.finish(), [0, 1, 0, 1, 0, 1])
+        self.assertEqual(counter.value, 1)
+
+    def test_recorded_schedule_can_be_replayed(self):
+        def run(chooser):
+            counter = Counter()
+            players = [ProcessPlayer(counter.increment, str(idx))
+                       for idx in range(3)]
+            schedule = InterleavingConductor(players, chooser=chooser).finish()
+            return schedule, counter.value
+
+        schedule, value = run(RandomChooser(seed=5))
+
+        self.assertEqual(run(ReplayChooser(schedule)), (schedule, value))
+
+    def test_blocked_player_lets_others_run(self):
+        queue = Queue()
+        received = []
+
+        consumer = ProcessPlayer(lambda: received.append(queue.get()), 'c')
+        producer = ProcessPlayer(lambda: queue.put('item'), 'p')
+
+        # The consumer insists on running first, and blocks on the queue
+        conductor = InterleavingConductor(
+            [consumer, producer], chooser=ReplayChooser([0] * 10),
+            quantum=0.01)
+        conductor.finish()
+
+        self.assertEqual(received, ['item'])
+
+    def test_regular_checkpoints_pause_the_players(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp = player.add_checkpoint_after(machine.second_phase)
+
+        conductor = InterleavingConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(machine.steps, [1, 2])
+        self.assertIsNone(next(conductor))
+        self.assertEqual(machine.steps, [1, 2, 3])
+
+    def test_bound_checkpoints_only_pause_on_their_instance(self):
+        journal = []
+        machine1 = JournalingMachine('m1', journal)
+        machine2 = JournalingMachine('m2', journal)
+
+        def run_both():
+            machine2()
+            machine1()
+
+        player = ProcessPlayer(run_both)
+        cp = player.add_checkpoint_after(machine1.first_phase, bound=True)
+
+        conductor = InterleavingConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(journal, [('m2', 1), ('m2', 2), ('m2', 3), ('m1', 1)])
+        self.assertIsNone(next(conductor))
+
+    def test_bound_c_methods_only_pause_on_their_instance(self):
+        journal1, journal2 = [], []
+
+        def append_to_both():
+            journal2.append(2)
+            journal1.append(1)
+            journal2.append(2)
+
+        player = ProcessPlayer(append_to_both)
+        cp = player.add_checkpoint_after(journal1.append, bound=True)
+
+        conductor = InterleavingConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual((journal1, journal2), ([1], [2]))
+        self.assertIsNone(next(conductor))
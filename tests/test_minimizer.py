@@ -0,0 +1,51 @@
+import unittest
+
+from pyvaldi.minimizer import Minimizer, schedule_steps, split
+
+from .artefacts import EarlyReactionScenario, LostUpdateScenario
+
+
+class MinimizerTestCase(unittest.TestCase):
+    def test_failing_order_is_reduced_across_processes(self):
+        minimizer = Minimizer(LostUpdateScenario(memoize=False), processes=2)
+
+        steps = minimizer.minimize((0, 1, 0, 1))
+
+        # d1 reads, then d0 deposits before d1 writes what it read. d1
+        # keeps its second checkpoint, or it would run to its end right
+        # after reading.
+        self.assertEqual(steps, ((1, 0), (0, 1), (1, 1)))
+
+    def test_orders_already_run_are_not_run_again(self):
+        minimizer = Minimizer(LostUpdateScenario(memoize=False), processes=0)
+
+        steps = minimizer.minimize((0, 1, 0, 1))
+        runs = minimizer.runs
+
+        self.assertEqual(steps, ((1, 0), (0, 1), (1, 1)))
+        self.assertGreater(minimizer.cached, 0)
+        self.assertEqual(minimizer.minimize((0, 1, 0, 1)), steps)
+        self.assertEqual(minimizer.runs, runs)
+
+    def test_orders_running_past_the_deadline_pass(self):
+        for processes in (0, 2):
+            minimizer = Minimizer(
+                EarlyReactionScenario(), processes=processes, timeout=0.5)
+
+            # signal, react, finish: holding the signaller after prepare
+            # instead, or not starting it, keeps the waiter waiting
+            steps = minimizer.minimize((0, 0, 1, 0))
+
+            self.assertEqual(steps, ((0, 1), (1, 0), (0, 2)))
+            self.assertGreater(minimizer.timeouts, 0)
+
+    def test_passing_order_is_rejected(self):
+        minimizer = Minimizer(LostUpdateScenario(memoize=False), processes=0)
+
+        self.assertRaises(ValueError, minimizer.minimize, (0, 0, 1, 1))
+
+    def test_schedule_is_turned_into_steps(self):
+        self.assertEqual(schedule_steps((1, 0, 1)), ((1, 0), (0, 0), (1, 1)))
+
+    def test_steps_are_split_in_almost_equal_parts(self):
+        self.assertEqual(split((1, 2, 3, 4, 5), 3), [(1, 2), (3, 4), (5,)])
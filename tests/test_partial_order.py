@@ -0,0 +1,97 @@
+import threading
+import unittest
+
+from pyvaldi import ProcessPlayer, ProcessConductor, PartialMusicSheet
+
+from .artefacts import JournalingMachine
+
+
+class PartialMusicSheetTestCase(unittest.TestCase):
+    def test_cycle_between_players_is_rejected(self):
+        journal = []
+        machine1 = JournalingMachine('m1', journal)
+        machine2 = JournalingMachine('m2', journal)
+        p1 = ProcessPlayer(machine1)
+        p2 = ProcessPlayer(machine2)
+
+        cp1_1 = p1.add_checkpoint_before(machine1.first_phase)
+        cp1_2 = p1.add_checkpoint_before(machine1.second_phase)
+        cp2_1 = p2.add_checkpoint_before(machine2.first_phase)
+        cp2_2 = p2.add_checkpoint_before(machine2.second_phase)
+
+        with self.assertRaises(ValueError):
+            PartialMusicSheet(
+                [cp1_1, cp1_2, cp2_1, cp2_2],
+                [(cp1_2, cp2_1), (cp2_2, cp1_1)])
+
+    def test_unknown_checkpoint_is_rejected(self):
+        machine = JournalingMachine('m', [])
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_before(machine.first_phase)
+        cp2 = player.add_checkpoint_before(machine.second_phase)
+
+        with self.assertRaises(ValueError):
+            PartialMusicSheet([cp1], [(cp1, cp2)])
+
+    def test_constraints_on_implicit_checkpoints_are_accepted(self):
+        machine1 = JournalingMachine('m1', [])
+        machine2 = JournalingMachine('m2', [])
+        p1 = ProcessPlayer(machine1)
+        p2 = ProcessPlayer(machine2)
+        cp1 = p1.add_checkpoint_before(machine1.first_phase)
+        cp2 = p2.add_checkpoint_before(machine2.first_phase)
+
+        sheet = PartialMusicSheet(
+            [cp1, cp2],
+            [(p1.get_terminal_checkpoint(), p2.get_initial_checkpoint())])
+
+        self.assertEqual(sheet.player_checkpoints(p2), [
+            p2.get_initial_checkpoint(), cp2, p2.get_terminal_checkpoint()])
+        self.assertEqual(sheet.predecessors[p2.get_initial_checkpoint()],
+                         [p1.get_terminal_checkpoint()])
+
+
+class PartialOrderConductorTestCase(unittest.TestCase):
+    def test_constrained_checkpoints_are_reached_in_order(self):
+        journal = []
+        machine1 = JournalingMachine('m1', journal)
+        machine2 = JournalingMachine('m2', journal)
+        p1 = ProcessPlayer(machine1)
+        p2 = ProcessPlayer(machine2)
+
+        commit = p1.add_checkpoint_after(machine1.third_phase)
+        read = p2.add_checkpoint_before(machine2.first_phase)
+
+        conductor = ProcessConductor(
+            [p2, p1], [read, commit], constraints=[(commit, read)])
+
+        self.assertIs(next(conductor), commit)
+        self.assertIs(next(conductor), read)
+        self.assertIsNone(next(conductor))
+        self.assertLess(journal.index(('m1', 3)), journal.index(('m2', 1)))
+        self.assertEqual(len(journal), 6)
+
+    def test_unconstrained_players_run_concurrently(self):
+        # Each player waits for the other to have started. Serially run
+        # players would never get past the first call.
+        started = [threading.Event(), threading.Event()]
+        outcomes = []
+
+        def rendezvous(own, other):
+            started[own].set()
+            outcomes.append(started[other].wait(5))
+
+        def act(own, other):
+            rendezvous(own, other)
+
+        p1 = ProcessPlayer(act, 'p1', 0, 1)
+        p2 = ProcessPlayer(act, 'p2', 1, 0)
+        cp1 = p1.add_checkpoint_after(rendezvous)
+        cp2 = p2.add_checkpoint_after(rendezvous)
+
+        conductor = ProcessConductor([p1, p2], [cp1, cp2], constraints=[])
+
+        self.assertEqual(set([next(conductor), next(conductor)]),
+                         set([cp1, cp2]))
+        self.assertIsNone(next(conductor))
+        self.assertEqual(outcomes, [True, True])
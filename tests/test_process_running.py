@@ -2,7 +2,7 @@ import unittest
 
 from pyvaldi import ProcessPlayer, ProcessConductor
 
-from .artefacts import ThreePhaseMachine
+from .artefacts import JournalingMachine, ThreePhaseMachine
 
 
 class SingleThreadTestCase(unittest.TestCase):
@@ -156,3 +156,90 @@ class TwoThreadsTestCase(unittest.TestCase):
         # special non-explicit case. Let's just let the currently running
         # thread to continue
         self.assertEqual(machine1.steps, [1, 2, 3])
+
+
+class PauseAtTestCase(unittest.TestCase):
+    def test_intermediate_checkpoints_are_passed_through(self):
+        machine1 = ThreePhaseMachine()
+        machine2 = ThreePhaseMachine()
+        p1 = ProcessPlayer(machine1, 'p1')
+        p2 = ProcessPlayer(machine2, 'p2')
+        cp1_1 = p1.add_checkpoint_after(machine1.first_phase)
+        cp1_2 = p1.add_checkpoint_after(machine1.second_phase)
+        cp1_3 = p1.add_checkpoint_before(machine1.third_phase)
+        cp2_1 = p2.add_checkpoint_after(machine2.first_phase)
+
+        conductor = ProcessConductor(
+            [p1, p2], [cp1_1, cp1_2, cp1_3, cp2_1], pause_at=[cp1_3, cp2_1])
+
+        self.assertIs(next(conductor), cp1_3)
+        self.assertEqual((machine1.steps, machine2.steps), ([1, 2], []))
+        self.assertIs(next(conductor), cp2_1)
+        self.assertEqual((machine1.steps, machine2.steps), ([1, 2, 3], [1]))
+        self.assertIsNone(next(conductor))
+        self.assertEqual(machine2.steps, [1, 2, 3])
+
+    def test_pauses_must_be_among_the_checkpoints(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_after(machine.first_phase)
+        cp2 = player.add_checkpoint_after(machine.second_phase)
+
+        with self.assertRaises(ValueError):
+            ProcessConductor([player], [cp1], pause_at=[cp2])
+
+
+class BoundCheckpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.journal = []
+        self.machine1 = JournalingMachine('m1', self.journal)
+        self.machine2 = JournalingMachine('m2', self.journal)
+
+    def run_both(self):
+        self.machine2()
+        self.machine1()
+
+    def test_checkpoint_is_only_reached_on_its_instance(self):
+        player = ProcessPlayer(self.run_both)
+        cp = player.add_checkpoint_after(self.machine1.first_phase, bound=True)
+
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(self.journal, [
+            ('m2', 1), ('m2', 2), ('m2', 3), ('m1', 1)])
+        self.assertIsNone(next(conductor))
+
+    def test_unbound_checkpoint_is_reached_on_any_instance(self):
+        player = ProcessPlayer(self.run_both)
+        cp = player.add_checkpoint_before(self.machine1.second_phase)
+
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual(self.journal, [('m2', 1)])
+        self.assertIsNone(next(conductor))
+
+    def test_bound_c_method_is_only_reached_on_its_instance(self):
+        journal1, journal2 = [], []
+
+        def append_to_both():
+            journal2.append(2)
+            journal1.append(1)
+
+        player = ProcessPlayer(append_to_both)
+        cp = player.add_checkpoint_after(journal1.append, bound=True)
+
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertIs(next(conductor), cp)
+        self.assertEqual((journal1, journal2), ([1], [2]))
+        self.assertIsNone(next(conductor))
+
+    def test_only_methods_of_instances_can_be_bound(self):
+        player = ProcessPlayer(self.run_both)
+
+        with self.assertRaises(ValueError):
+            player.add_checkpoint_after(len, bound=True)
+        with self.assertRaises(ValueError):
+            player.add_checkpoint_after(self.run_both.__func__, bound=True)
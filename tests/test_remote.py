@@ -0,0 +1,167 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from pyvaldi import ProcessPlayer, ProcessConductor
+from pyvaldi.remote import (
+    ARRIVED, GRANT, HELLO, SCORE, Channel, ConductorServer, PlayerAgent)
+
+from .artefacts import ThreePhaseMachine
+
+
+def start_agent(agent):
+    thread = threading.Thread(target=agent.run)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+class RemotePlayerTestCase(unittest.TestCase):
+    address = ('127.0.0.1', 0)
+
+    def setUp(self):
+        self.server = ConductorServer(self.address)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_remote_thread_state_changes_after_each_checkpoint(self):
+        machine = ThreePhaseMachine()
+        agent = PlayerAgent(self.server.address, machine, 'remote')
+        agent.add_checkpoint_before(machine.first_phase, 'first')
+        agent.add_checkpoint_before(machine.second_phase, 'second')
+        agent.add_checkpoint_after(machine.third_phase, 'third')
+        agent_thread = start_agent(agent)
+
+        player = self.server.player('remote')
+        cp1 = player.add_checkpoint_before('first')
+        cp2 = player.add_checkpoint_before('second')
+        cp3 = player.add_checkpoint_after('third')
+
+        conductor = ProcessConductor([player], [cp1, cp2, cp3])
+
+        self.assertIs(next(conductor), cp1)
+        self.assertEqual(machine.steps, [])
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(machine.steps, [1])
+        self.assertIs(next(conductor), cp3)
+        self.assertEqual(machine.steps, [1, 2, 3])
+        self.assertIsNone(next(conductor))
+
+        agent_thread.join(5)
+        self.assertFalse(agent_thread.is_alive())
+
+    def test_remote_and_local_players_are_interleaved(self):
+        remote_machine = ThreePhaseMachine()
+        local_machine = ThreePhaseMachine()
+
+        agent = PlayerAgent(self.server.address, remote_machine, 'remote')
+        agent.add_checkpoint_before(remote_machine.second_phase, 'second')
+        start_agent(agent)
+
+        remote = self.server.player('remote')
+        local = ProcessPlayer(local_machine, 'local')
+
+        cp1 = remote.add_checkpoint_before('second')
+        cp2 = local.add_checkpoint_after(local_machine.third_phase)
+
+        conductor = ProcessConductor([remote, local], [cp1, cp2])
+
+        self.assertIs(next(conductor), cp1)
+        self.assertEqual(remote_machine.steps, [1])
+        self.assertEqual(local_machine.steps, [])
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(remote_machine.steps, [1, 2, 3])
+        self.assertEqual(local_machine.steps, [1, 2, 3])
+
+    def test_agents_may_connect_in_any_order(self):
+        machine1 = ThreePhaseMachine()
+        machine2 = ThreePhaseMachine()
+
+        agent2 = PlayerAgent(self.server.address, machine2, 'p2')
+        agent2.add_checkpoint_before(machine2.third_phase, 'third')
+        start_agent(agent2)
+        agent1 = PlayerAgent(self.server.address, machine1, 'p1')
+        agent1.add_checkpoint_before(machine1.third_phase, 'third')
+        start_agent(agent1)
+
+        player1 = self.server.player('p1')
+        player2 = self.server.player('p2')
+        cp1 = player1.add_checkpoint_before('third')
+        cp2 = player2.add_checkpoint_before('third')
+
+        conductor = ProcessConductor([player1, player2], [cp1, cp2])
+
+        self.assertIs(next(conductor), cp1)
+        self.assertEqual(machine1.steps, [1, 2])
+        self.assertEqual(machine2.steps, [])
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(machine1.steps, [1, 2, 3])
+        self.assertEqual(machine2.steps, [1, 2])
+
+    def test_agent_disconnecting_is_raised_by_the_conductor(self):
+        def disconnect_after_starting():
+            family = (socket.AF_INET if isinstance(self.address, tuple)
+                      else socket.AF_UNIX)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.connect(self.server.address)
+            channel = Channel(sock)
+            channel.send(HELLO, payload=b'remote')
+            channel.expect(SCORE)
+            position, _ = channel.expect(GRANT)
+            channel.send(ARRIVED, position)
+            channel.close()
+
+        agent_thread = threading.Thread(target=disconnect_after_starting)
+        agent_thread.daemon = True
+        agent_thread.start()
+        player = self.server.player('remote')
+        cp1 = player.add_checkpoint_before('first')
+        cp2 = player.add_checkpoint_before('second')
+
+        conductor = ProcessConductor([player], [cp1, cp2])
+
+        # Noticed while reading or writing, depending on the timing
+        with self.assertRaises((EOFError, socket.error)) as context:
+            next(conductor)
+        self.assertIs(context.exception, player.error)
+        # The player's remaining checkpoints are passed through
+        self.assertIs(next(conductor), cp2)
+        self.assertIsNone(next(conductor))
+
+    def test_agent_never_connecting_is_raised_by_the_conductor(self):
+        self.server.close()
+        if not isinstance(self.address, tuple):
+            os.unlink(self.address)
+        self.server = ConductorServer(self.address, accept_timeout=0.1)
+        player = self.server.player('remote')
+        cp = player.add_checkpoint_before('first')
+
+        conductor = ProcessConductor([player], [cp])
+
+        self.assertRaises(socket.timeout, next, conductor)
+        self.assertIsNone(next(conductor))
+
+    def test_agent_checkpoint_names_must_be_unique(self):
+        machine = ThreePhaseMachine()
+        agent = PlayerAgent(self.server.address, machine, 'remote')
+        agent.add_checkpoint_before(machine.first_phase)
+
+        with self.assertRaises(ValueError):
+            agent.add_checkpoint_after(machine.first_phase)
+        agent.add_checkpoint_after(machine.first_phase, 'first_phase done')
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets unavailable")
+class UnixSocketRemotePlayerTestCase(RemotePlayerTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.address = os.path.join(self.directory, 'conductor.sock')
+        super(UnixSocketRemotePlayerTestCase, self).setUp()
+
+    def tearDown(self):
+        super(UnixSocketRemotePlayerTestCase, self).tearDown()
+        os.unlink(self.address)
+        os.rmdir(self.directory)
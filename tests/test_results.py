@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.explorer import Explorer
+from pyvaldi.results import ResultsStore, numpy
+
+from .artefacts import LostUpdateScenario, ThreePhaseMachine
+
+
+class NamedLostUpdateScenario(LostUpdateScenario):
+    def setup(self):
+        players, checkpoints = super(NamedLostUpdateScenario, self).setup()
+        for checkpoint in checkpoints:
+            checkpoint.name = u'{}.{}'.format(
+                checkpoint.player.name, checkpoint.callable.__name__)
+        return players, checkpoints
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class ResultsStoreTestCase(unittest.TestCase):
+    def test_arrays_grow_in_chunks(self):
+        store = ResultsStore(['a', 'b'], chunk_size=4)
+
+        for idx in range(10):
+            store.append(['b', 'a'], [idx, 2 * idx], failed=idx % 2)
+
+        self.assertEqual(len(store), 10)
+        self.assertEqual(len(store.failed), 12)
+        self.assertEqual(store.view('durations')[3].tolist(), [6, 3])
+        self.assertEqual(store.view('orders')[3].tolist(), [1, 0])
+        self.assertEqual(store.failure_rate(), 0.5)
+
+    def test_unreached_checkpoints_are_left_out(self):
+        store = ResultsStore(['a', 'b'])
+        store.append(['a'], [1.0])
+        store.append(['a', 'b'], [3.0, 5.0])
+
+        self.assertEqual(store.view('orders')[0].tolist(), [0, -1])
+        self.assertEqual(store.percentiles([50]).tolist(), [[2.0, 5.0]])
+        self.assertEqual(store.totals().tolist(), [1.0, 8.0])
+        self.assertEqual(store.slowest(1).tolist(), [1])
+
+    def test_unnamed_or_same_named_checkpoints_are_rejected(self):
+        store = ResultsStore(['a', 'b'])
+
+        self.assertRaises(ValueError, store.append, [None], [1.0])
+        self.assertRaises(ValueError, store.append, ['a', 'a'], [1.0, 2.0])
+        self.assertRaises(ValueError, ResultsStore, ['a', 'a'])
+        self.assertEqual(len(store), 0)
+
+    def test_failures_are_clustered_by_order(self):
+        store = ResultsStore(['a', 'b'])
+        store.append(['a', 'b'], [0, 0], failed=False)
+        store.append(['b', 'a'], [0, 0], failed=True)
+        store.append(['b', 'a'], [0, 0], failed=True)
+        store.append(['a', 'b'], [0, 0], failed=False)
+        store.append(['a', 'b'], [0, 0], failed=True)
+
+        orders, runs, failures = store.failure_clusters()
+
+        self.assertEqual(orders.tolist(), [[1, 0], [0, 1]])
+        self.assertEqual(runs.tolist(), [2, 3])
+        self.assertEqual(failures.tolist(), [2, 1])
+
+    def test_results_are_saved_and_loaded(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'results.npz')
+        store = ResultsStore(['a', 'b'])
+        store.append(['a', 'b'], [1.0, 2.0], failed=True)
+        store.save(path)
+
+        loaded = ResultsStore.load(path)
+        loaded.append(['b', 'a'], [3.0, 4.0])
+
+        self.assertEqual(loaded.names, ['a', 'b'])
+        self.assertEqual(loaded.view('durations').tolist(),
+                         [[1.0, 2.0], [4.0, 3.0]])
+        self.assertEqual(loaded.view('failed').tolist(), [True, False])
+
+    def test_conducted_run_is_recorded(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_after(machine.first_phase, 'first')
+        cp2 = player.add_checkpoint_after(machine.second_phase, 'second')
+        store = ResultsStore(['second', 'first'])
+
+        failed = store.record_run(ProcessConductor([player], [cp1, cp2]))
+
+        self.assertFalse(failed)
+        self.assertEqual(store.view('orders').tolist(), [[1, 0]])
+        self.assertTrue((store.view('durations') > 0).all())
+
+    def test_explored_runs_are_recorded(self):
+        store = ResultsStore(
+            ['d0.read', 'd0.write', 'd1.read', 'd1.write'])
+        explorer = Explorer(NamedLostUpdateScenario(memoize=False),
+                            results=store)
+
+        explorer.explore()
+
+        self.assertEqual(len(store), 6)
+        self.assertEqual(int(store.view('failed').sum()), 4)
+        orders, runs, failures = store.failure_clusters()
+        self.assertEqual(len(orders), 6)
+        self.assertEqual(failures.tolist(), [1, 1, 1, 1, 0, 0])
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pyvaldi import ProcessPlayer, ProcessConductor
+from pyvaldi.stacktracer import TraceDumper, sample_stacks
+
+from .artefacts import ThreePhaseMachine
+
+
+class StackSamplingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_waiting_player_is_annotated_with_its_checkpoint(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_before(machine.first_phase)
+        cp2 = player.add_checkpoint_before(machine.second_phase)
+
+        conductor = ProcessConductor([player], [cp1, cp2])
+        next(conductor)
+
+        samples = sample_stacks()
+        checkpoint, stack = samples[player.instrument.ident]
+        # After reaching cp1, the player waits for permission to run to cp2
+        self.assertIs(checkpoint, cp2)
+        self.assertEqual(stack[-1][2], 'wait')
+
+    def test_file_is_written_only_when_stacks_changed(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_before(machine.first_phase)
+        cp2 = player.add_checkpoint_before(machine.second_phase)
+        conductor = ProcessConductor([player], [cp1, cp2])
+        next(conductor)
+
+        dumper = TraceDumper(
+            os.path.join(self.directory, 'trace.json'), 1, True, 'json')
+
+        self.assertTrue(dumper.stacktraces())
+        self.assertFalse(dumper.stacktraces())
+        next(conductor)
+        self.assertTrue(dumper.stacktraces())
+
+        with open(dumper.fpath) as trace:
+            dump = json.load(trace)
+        waiting = [thread['waiting_on'] for thread in dump
+                   if thread['thread_id'] == player.instrument.ident]
+        self.assertEqual(waiting, [str(player.get_terminal_checkpoint())])
+
+    def test_tracing_on_import_is_opt_in(self):
+        path = os.path.join(self.directory, 'trace.txt')
+        script = ('import pyvaldi, pyvaldi.stacktracer as tracer\n'
+                  'print(tracer._tracer is not None)\n')
+        env = dict(os.environ)
+        env.pop('PYVALDI_TRACE', None)
+
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         env=env)
+        self.assertEqual(output.strip(), b'False')
+
+        env['PYVALDI_TRACE'] = path
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         env=env)
+        self.assertEqual(output.strip(), b'True')
@@ -0,0 +1,121 @@
+import unittest
+
+from pyvaldi import ProcessPlayer
+from pyvaldi.checkpoints import UnreachedCheckpoint
+from pyvaldi.streaming import StreamingConductor, cycle, repeat
+
+from .artefacts import JournalingMachine, ThreePhaseMachine
+
+
+class Stepper(object):
+    def __init__(self, name, journal, steps):
+        self.name = name
+        self.journal = journal
+        self.steps = steps
+
+    def step(self):
+        self.journal.append(self.name)
+
+    def __call__(self):
+        for _ in range(self.steps):
+            self.step()
+
+
+class StreamingConductorTestCase(unittest.TestCase):
+    def test_thread_state_changes_after_each_checkpoint(self):
+        machine = ThreePhaseMachine()
+        player = ProcessPlayer(machine)
+        cp1 = player.add_checkpoint_before(machine.first_phase)
+        cp2 = player.add_checkpoint_after(machine.second_phase)
+
+        conductor = StreamingConductor([player], iter([cp1, cp2]))
+
+        self.assertIs(next(conductor), cp1)
+        self.assertEqual(machine.steps, [])
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(machine.steps, [1, 2])
+        self.assertIsNone(next(conductor))
+        self.assertEqual(machine.steps, [1, 2, 3])
+
+    def test_repeated_pattern_alternates_players(self):
+        journal = []
+        a = Stepper('a', journal, 500)
+        b = Stepper('b', journal, 500)
+        player_a = ProcessPlayer(a, 'a')
+        player_b = ProcessPlayer(b, 'b')
+        a_step = player_a.add_checkpoint_after(a.step)
+        b_step = player_b.add_checkpoint_after(b.step)
+
+        conductor = StreamingConductor(
+            [player_a, player_b], repeat([a_step, b_step], 500))
+
+        while conductor.next() is not None:
+            pass
+        self.assertEqual(journal, ['a', 'b'] * 500)
+
+    def test_notes_are_read_lazily(self):
+        consumed = []
+
+        def notes(checkpoint):
+            for note in cycle([checkpoint]):
+                consumed.append(note)
+                yield note
+
+        stepper = Stepper('s', [], 1000)
+        player = ProcessPlayer(stepper)
+        cp = player.add_checkpoint_before(stepper.step)
+
+        conductor = StreamingConductor([player], notes(cp))
+        for _ in range(10):
+            self.assertIs(next(conductor), cp)
+
+        self.assertEqual(len(consumed), 10)
+        self.assertEqual(stepper.journal, ['s'] * 9)
+
+    def test_players_end_once_the_notes_are_exhausted(self):
+        journal = []
+        machine1 = JournalingMachine('m1', journal)
+        machine2 = JournalingMachine('m2', journal)
+        p1 = ProcessPlayer(machine1)
+        p2 = ProcessPlayer(machine2)
+        cp1 = p1.add_checkpoint_after(machine1.first_phase)
+        cp2 = p2.add_checkpoint_after(machine2.first_phase)
+
+        conductor = StreamingConductor([p1, p2], [cp1, cp2])
+
+        self.assertIs(next(conductor), cp1)
+        self.assertIs(next(conductor), cp2)
+        self.assertEqual(journal, [('m1', 1), ('m2', 1)])
+        self.assertIsNone(next(conductor))
+        self.assertEqual(journal, [
+            ('m1', 1), ('m2', 1), ('m1', 2), ('m1', 3), ('m2', 2), ('m2', 3)])
+
+    def test_player_ending_early_is_raised(self):
+        stepper = Stepper('s', [], 2)
+        player = ProcessPlayer(stepper)
+        cp = player.add_checkpoint_after(stepper.step)
+
+        conductor = StreamingConductor([player], repeat([cp], 3))
+
+        self.assertIs(next(conductor), cp)
+        self.assertIs(next(conductor), cp)
+        with self.assertRaises(UnreachedCheckpoint) as context:
+            next(conductor)
+        self.assertIs(context.exception.checkpoint, cp)
+        self.assertIsNone(next(conductor))
+
+    def test_player_exceptions_are_raised(self):
+        stepper = Stepper('s', [], 1)
+
+        def fail():
+            stepper()
+            raise KeyError('player')
+
+        player = ProcessPlayer(fail)
+        cp = player.add_checkpoint_after(stepper.step)
+
+        conductor = StreamingConductor([player], repeat([cp], 2))
+
+        self.assertIs(next(conductor), cp)
+        self.assertRaises(KeyError, next, conductor)
+        self.assertIsNone(next(conductor))
@@ -0,0 +1,169 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.checkpoints import UnreachedCheckpoint
+from pyvaldi.subprocesses import STDIN, SubprocessPlayer, get_reader
+
+from .artefacts import JournalingMachine
+
+# Writes its name to the journal file and announces it, for every step.
+# In the stdin mode it then waits to be let go on.
+STEPPER = '''
+import sys
+journal, name, steps, wait = sys.argv[1:]
+for step in range(1, int(steps) + 1):
+    with open(journal, 'a') as f:
+        f.write('{} {}\\n'.format(name, step))
+    print('step {}'.format(step))
+    sys.stdout.flush()
+    if wait == 'wait':
+        sys.stdin.readline()
+'''
+
+
+def stepper(journal, name, steps, pause='signal', **kwargs):
+    wait = 'wait' if pause == STDIN else 'nowait'
+    return SubprocessPlayer(
+        [sys.executable, '-c', STEPPER, journal, name, str(steps), wait],
+        name, pause=pause, **kwargs)
+
+
+class SubprocessPlayerTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.journal = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.journal)
+
+    def read_journal(self):
+        with open(self.journal) as f:
+            return f.read().splitlines()
+
+    def test_programs_are_paused_at_their_checkpoints(self):
+        p1 = stepper(self.journal, 'p1', 2, pause=STDIN)
+        p2 = stepper(self.journal, 'p2', 1, pause=STDIN)
+        cp1_1 = p1.add_checkpoint('^step 1$')
+        cp1_2 = p1.add_checkpoint('^step 2$')
+        cp2_1 = p2.add_checkpoint('^step 1$')
+
+        conductor = ProcessConductor([p1, p2], [cp1_1, cp2_1, cp1_2])
+
+        self.assertIs(next(conductor), cp1_1)
+        self.assertEqual(self.read_journal(), ['p1 1'])
+        self.assertIs(next(conductor), cp2_1)
+        self.assertEqual(self.read_journal(), ['p1 1', 'p2 1'])
+        self.assertIs(next(conductor), cp1_2)
+        self.assertEqual(self.read_journal(), ['p1 1', 'p2 1', 'p1 2'])
+        self.assertIsNone(next(conductor))
+        self.assertEqual((p1.returncode, p2.returncode), (0, 0))
+        self.assertEqual(p1.output, [('stdout', 'step 1'), ('stdout', 'step 2')])
+
+    def test_programs_are_stopped_by_signals(self):
+        script = ('import sys, time\n'
+                  'print("ready"); sys.stdout.flush()\n'
+                  'time.sleep(0.1)\n'
+                  'open(sys.argv[1], "a").write("done\\n")\n')
+        player = SubprocessPlayer([sys.executable, '-c', script, self.journal])
+        ready = player.add_checkpoint('ready')
+
+        conductor = ProcessConductor([player], [ready])
+
+        self.assertIs(next(conductor), ready)
+        time.sleep(0.5)
+        self.assertEqual(self.read_journal(), [])
+        self.assertIsNone(next(conductor))
+        self.assertEqual(self.read_journal(), ['done'])
+
+    def test_checkpoints_can_match_stderr_only(self):
+        script = ('import sys\n'
+                  'print("warning")\n'
+                  'sys.stdout.flush()\n'
+                  'sys.stderr.write("warning\\n")\n')
+        player = SubprocessPlayer([sys.executable, '-c', script])
+        warning = player.add_checkpoint('warning', stream='stderr')
+
+        conductor = ProcessConductor([player], [warning])
+
+        self.assertIs(next(conductor), warning)
+        self.assertEqual(player.output[-1], ('stderr', 'warning'))
+        self.assertIsNone(next(conductor))
+
+    def test_subprocesses_and_threads_play_together(self):
+        journal = []
+        machine = JournalingMachine('m', journal)
+        thread_player = ProcessPlayer(machine)
+        program = stepper(self.journal, 'p', 1, pause=STDIN)
+        first_phase = thread_player.add_checkpoint_after(machine.first_phase)
+        step = program.add_checkpoint('step 1')
+
+        conductor = ProcessConductor(
+            [thread_player, program], [step, first_phase])
+
+        self.assertIs(next(conductor), step)
+        self.assertEqual(journal, [])
+        self.assertIs(next(conductor), first_phase)
+        self.assertEqual(journal, [('m', 1)])
+        self.assertIsNone(next(conductor))
+
+    def test_program_ending_early_leaves_checkpoint_unreached(self):
+        player = SubprocessPlayer([sys.executable, '-c', 'pass'])
+        never = player.add_checkpoint('never written')
+
+        conductor = ProcessConductor([player], [never])
+
+        with self.assertRaises(UnreachedCheckpoint) as raised:
+            next(conductor)
+        self.assertIs(raised.exception.checkpoint, never)
+        self.assertIs(player.unreached, never)
+        self.assertIsNone(next(conductor))
+
+    def test_errors_end_their_player_only(self):
+        player = stepper(self.journal, 'p', 1, bogus=True)
+        other = stepper(self.journal, 'other', 1)
+        step = player.add_checkpoint('step 1')
+        other_step = other.add_checkpoint('step 1')
+
+        conductor = ProcessConductor([player, other], [step, other_step])
+
+        with self.assertRaises(TypeError):
+            next(conductor)
+        self.assertIsInstance(player.error, TypeError)
+        self.assertIs(next(conductor), other_step)
+        self.assertIsNone(next(conductor))
+        self.assertEqual(self.read_journal(), ['other 1'])
+
+    def test_players_share_one_reader_thread(self):
+        threads = threading.active_count()
+        players = [stepper(self.journal, 'p{}'.format(idx), 1, pause=STDIN)
+                   for idx in range(10)]
+        steps = [player.add_checkpoint('step 1') for player in players]
+
+        conductor = ProcessConductor(players, steps)
+
+        self.assertEqual(list(iter(conductor.next, None)), steps)
+        self.assertEqual(set(player.reader for player in players),
+                         set([get_reader()]))
+        self.assertLessEqual(threading.active_count(), threads + 1)
+        self.assertEqual(self.read_journal(),
+                         ['p{} 1'.format(idx) for idx in range(10)])
+
+    def test_checkpoints_granted_at_once_are_passed_through(self):
+        for pause in ('signal', STDIN):
+            player = stepper(self.journal, pause, 3, pause=pause)
+            steps = [player.add_checkpoint('^step {}$'.format(step))
+                     for step in (1, 2, 3)]
+
+            conductor = ProcessConductor([player], steps, pause_at=steps[1:2])
+
+            self.assertIs(next(conductor), steps[1])
+            self.assertIsNone(next(conductor))
+            self.assertEqual(player.returncode, 0)
+        self.assertEqual(self.read_journal(), [
+            'signal 1', 'signal 2', 'signal 3',
+            'stdin 1', 'stdin 2', 'stdin 3'])
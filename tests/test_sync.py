@@ -0,0 +1,70 @@
+import threading
+import unittest
+
+from pyvaldi import ProcessConductor, ProcessPlayer
+from pyvaldi.sync import CascadingEventGroup
+
+
+class CascadingEventGroupTestCase(unittest.TestCase):
+    def test_events_are_set_in_token_order(self):
+        group = CascadingEventGroup(['a', 'b', 'c'])
+
+        group.done_with('a')
+        with self.assertRaises(threading.ThreadError):
+            group.done_with('c')
+        group.done_with('b')
+
+        self.assertEqual(group.next_token(), 'c')
+        self.assertTrue(group.event_dict['b'].is_set())
+        self.assertFalse(group.event_dict['c'].is_set())
+
+    def test_tokens_are_only_done_with_once(self):
+        group = CascadingEventGroup(['a', 'b'])
+        group.done_with('a')
+
+        with self.assertRaises(threading.ThreadError):
+            group.done_with('a')
+
+    def test_threads_setting_events_in_turn(self):
+        tokens = list(range(1000))
+        group = CascadingEventGroup(tokens)
+
+        def set_every(start):
+            for token in tokens[start::4]:
+                if token:
+                    group.wait_on(token - 1)
+                group.done_with(token)
+
+        threads = [threading.Thread(target=set_every, args=(start,))
+                   for start in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIsNone(group.next_token())
+
+
+class SingleDriverTestCase(unittest.TestCase):
+    def test_conductor_is_driven_by_one_thread_at_a_time(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocked():
+            started.set()
+            release.wait()
+
+        player = ProcessPlayer(blocked)
+        cp = player.add_checkpoint_after(blocked)
+        conductor = ProcessConductor([player], [cp])
+
+        driver = threading.Thread(target=conductor.next)
+        driver.start()
+        # The player only starts once next() granted it permission
+        self.assertTrue(started.wait(5))
+
+        with self.assertRaises(RuntimeError):
+            conductor.next()
+        release.set()
+        driver.join()
+        self.assertIsNone(conductor.next())